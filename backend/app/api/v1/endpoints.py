@@ -1,32 +1,190 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+import asyncio
+import hashlib
+import itertools
+import logging
+import numpy as np
+import orjson
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from typing import List, Optional
 from datetime import datetime
+from pydantic import TypeAdapter, ValidationError
+from app.core.config import settings
 from app.models.schemas import Order, RouteResponse, StatsResponse
 from app.services.rl_agent import RLAgent
 from app.services.road_network import road_network
 from app.services.travel_time_predictor import travel_predictor
+from app.services.traffic_api import traffic_client
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-agent = RLAgent()
+# Einmal kompilierter Validator für den Request-Body von /route/optimize
+_ORDER_LIST_ADAPTER = TypeAdapter(List[Order])
 
-@router.post("/route/optimize", response_model=RouteResponse, tags=["routing"])
-def optimize_route(orders: List[Order]):
+# Memoisierte Vorhersagen für identische Order-Listen (z.B. UI re-POSTs);
+# Zugriff nur aus dem Event-Loop, daher ohne Lock
+_route_cache: TTLCache = TTLCache(maxsize=1024, ttl=settings.ROUTE_LOCAL_CACHE_TTL)
+
+# Statistiken ändern sich nicht zur Laufzeit: einmal bauen, per ETag cachen
+_STATS = StatsResponse(
+    total_routes_optimized=42,
+    avg_duration_minutes=45,
+    total_orders_processed=156,
+    avg_stops_per_route=4.2
+)
+_STATS_BYTES = orjson.dumps(_STATS.model_dump())
+_STATS_ETAG = f'"{hashlib.md5(_STATS_BYTES).hexdigest()}"'
+
+# Fortlaufende Route-IDs (kollisionsfrei, kein Hashing pro Request)
+_route_counter = itertools.count(1)
+
+
+def get_agent(request: Request) -> RLAgent:
+    """
+    Liefert den im App-Lifespan erzeugten RL-Agent.
+    
+    Fallback ohne Lifespan (z.B. TestClient ohne Context-Manager):
+    der Agent wird beim ersten Request erzeugt und auf app.state abgelegt.
+    """
+    agent = getattr(request.app.state, "agent", None)
+    if agent is None:
+        agent = request.app.state.agent = RLAgent()
+    return agent
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Prüft ob der Client die aktuelle Version bereits hat (If-None-Match)."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return any(tag.strip().removeprefix("W/") in (etag, "*") for tag in if_none_match.split(","))
+
+
+def _ensure_locations(start: str, end: str):
+    """Prüft Start und Ziel im Straßennetz, sonst 404."""
+    if not road_network.has_location(start):
+        raise HTTPException(status_code=404, detail=f"Start location '{start}' not found")
+    if not road_network.has_location(end):
+        raise HTTPException(status_code=404, detail=f"End location '{end}' not found")
+
+
+def _parse_datetime(value: str, error_detail: str) -> datetime:
+    """
+    Parst einen ISO-8601 Zeitstempel, sonst 400.
+    
+    Ab Python 3.11 akzeptiert fromisoformat() auch das 'Z'-Suffix direkt
+    (C-Implementierung, kein replace() nötig).
+    """
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=error_detail)
+
+
+def _redis_route_key(cache_key: tuple) -> str:
+    """Worker-übergreifender Redis-Key aus dem kanonischen Cache-Key."""
+    return f"route:{hashlib.blake2b(orjson.dumps(cache_key), digest_size=16).hexdigest()}"
+
+
+async def _redis_get_stops(redis, key: str) -> Optional[List[str]]:
+    """
+    Liest gecachte Stops aus Redis; Redis-Fehler sind kein Request-Fehler.
+    
+    Nicht dekodierbare oder fremde Werte unter dem Key gelten als Miss.
+    """
+    try:
+        cached = await redis.get(key)
+        if cached is None:
+            return None
+        stops = orjson.loads(cached)
+    except orjson.JSONDecodeError as e:
+        logger.warning("Redis-Wert unter %s nicht dekodierbar: %s", key, e)
+        return None
+    except Exception as e:
+        logger.warning("Redis GET fehlgeschlagen: %s", e)
+        return None
+    if not isinstance(stops, list) or not all(isinstance(stop, str) for stop in stops):
+        logger.warning("Redis-Wert unter %s ist keine Stop-Liste", key)
+        return None
+    return stops
+
+
+async def _redis_set_stops(redis, key: str, stops: List[str]):
+    """Legt Stops als orjson-Bytes mit TTL in Redis ab."""
+    try:
+        await redis.setex(key, settings.ROUTE_CACHE_TTL, orjson.dumps(stops))
+    except Exception as e:
+        logger.warning("Redis SETEX fehlgeschlagen: %s", e)
+
+
+@router.post(
+    "/route/optimize",
+    response_model=RouteResponse,
+    tags=["routing"],
+    # Body wird direkt per TypeAdapter validiert, Schema daher manuell dokumentiert
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {"type": "array", "items": Order.model_json_schema()}
+                }
+            },
+        }
+    },
+)
+async def optimize_route(request: Request, response: Response, agent: RLAgent = Depends(get_agent)):
     """
     Optimiert eine Route basierend auf Aufträgen.
     
     - **orders**: Liste von Aufträgen mit Start, Ziel und Priorität
     - **returns**: Optimierte Route mit Stops und geschätzter Dauer
+      (Header X-Cache: HIT bei gecachter Route, sonst MISS)
     """
+    # JSON-Decode und Validierung in einem Durchlauf im pydantic-core
+    try:
+        orders = _ORDER_LIST_ADAPTER.validate_json(await request.body())
+    except ValidationError as e:
+        raise RequestValidationError(e.errors())
+    
     if not orders:
         raise HTTPException(status_code=400, detail="Orders list cannot be empty")
     
+    # Trainings-Stand im Key: nach erneutem Training ist der Cache automatisch ungültig
+    cache_key = (
+        len(agent.training_history),
+        tuple((o.order_id, o.start_location, o.end_location, o.priority) for o in orders),
+    )
+    
     try:
-        stops = agent.predict(orders)
+        stops = _route_cache.get(cache_key)
+        cache_status = "HIT"
+        if stops is None:
+            redis = getattr(request.app.state, "redis", None)
+            redis_key = _redis_route_key(cache_key) if redis is not None else None
+            if redis_key is not None:
+                stops = await _redis_get_stops(redis, redis_key)
+            if stops is None:
+                cache_status = "MISS"
+                batcher = getattr(request.app.state, "route_batcher", None)
+                if batcher is not None and batcher.running:
+                    # Gebündelt mit gleichzeitigen Requests (ein predict_batch-Aufruf)
+                    stops = await batcher.submit(orders)
+                else:
+                    delay_factor = await traffic_client.get_live_traffic_delay_async()
+                    # CPU-lastige Vorhersage im Threadpool, damit der Event-Loop frei bleibt
+                    stops = await asyncio.to_thread(agent.predict, orders, delay_factor)
+                if redis_key is not None:
+                    await _redis_set_stops(redis, redis_key, stops)
+            _route_cache[cache_key] = stops
         estimated_duration = max(10, len(stops) * 10)
+        response.headers["X-Cache"] = cache_status
         
         return RouteResponse(
-            route_id=f"route_{len(orders)}_{hash(tuple(o.order_id for o in orders)) % 10000}",
+            route_id=f"route_{next(_route_counter)}",
             stops=stops,
             estimated_duration_minutes=estimated_duration,
             total_orders=len(orders)
@@ -35,7 +193,7 @@ def optimize_route(orders: List[Order]):
         raise HTTPException(status_code=500, detail=f"Optimization failed: {str(e)}")
 
 @router.get("/route/{route_id}", tags=["routing"])
-def get_route(route_id: str):
+async def get_route(route_id: str):
     """Holt Details einer existierenden Route"""
     return {
         "route_id": route_id,
@@ -45,17 +203,14 @@ def get_route(route_id: str):
     }
 
 @router.get("/stats", response_model=StatsResponse, tags=["monitoring"])
-def get_stats():
-    """Statistiken über optimierte Routen"""
-    return StatsResponse(
-        total_routes_optimized=42,
-        avg_duration_minutes=45,
-        total_orders_processed=156,
-        avg_stops_per_route=4.2
-    )
+async def get_stats(request: Request):
+    """Statistiken über optimierte Routen (ETag/304-fähig)"""
+    if _etag_matches(request, _STATS_ETAG):
+        return Response(status_code=304, headers={"ETag": _STATS_ETAG})
+    return Response(_STATS_BYTES, media_type="application/json", headers={"ETag": _STATS_ETAG})
 
 @router.post("/data/upload", tags=["data"])
-def upload_data(file_name: str):
+async def upload_data(file_name: str):
     """Placeholder für Daten-Upload"""
     return {
         "message": f"Data file '{file_name}' uploaded successfully",
@@ -64,7 +219,7 @@ def upload_data(file_name: str):
 
 
 @router.get("/travel-time/predict", tags=["travel-time"])
-def predict_travel_time(
+async def predict_travel_time(
     start: str, 
     end: str, 
     departure_time: str = None
@@ -76,21 +231,15 @@ def predict_travel_time(
     - **end**: Zielort  
     - **departure_time**: ISO-Format datetime (optional, default: jetzt)
     """
-    if not road_network.has_location(start):
-        raise HTTPException(status_code=404, detail=f"Start location '{start}' not found")
-    if not road_network.has_location(end):
-        raise HTTPException(status_code=404, detail=f"End location '{end}' not found")
+    _ensure_locations(start, end)
     
     # Parse departure time
     if departure_time:
-        try:
-            dt = datetime.fromisoformat(departure_time.replace('Z', '+00:00'))
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid datetime format. Use ISO format.")
+        dt = _parse_datetime(departure_time, "Invalid datetime format. Use ISO format.")
     else:
         dt = datetime.now()
     
-    prediction = travel_predictor.predict_travel_time(start, end, dt)
+    prediction = await asyncio.to_thread(travel_predictor.predict_travel_time, start, end, dt)
     
     if 'error' in prediction:
         raise HTTPException(status_code=404, detail=prediction['error'])
@@ -99,7 +248,7 @@ def predict_travel_time(
 
 
 @router.get("/travel-time/optimal-departure", tags=["travel-time"])
-def get_optimal_departure(
+async def get_optimal_departure(
     start: str,
     end: str,
     earliest_departure: str = None,
@@ -115,28 +264,20 @@ def get_optimal_departure(
     - **latest_arrival**: Späteste Ankunft (ISO, optional)
     - **hours_window**: Suchfenster in Stunden (default: 12)
     """
-    if not road_network.has_location(start):
-        raise HTTPException(status_code=404, detail=f"Start location '{start}' not found")
-    if not road_network.has_location(end):
-        raise HTTPException(status_code=404, detail=f"End location '{end}' not found")
+    _ensure_locations(start, end)
     
     # Parse times
     earliest = None
     latest = None
     
     if earliest_departure:
-        try:
-            earliest = datetime.fromisoformat(earliest_departure.replace('Z', '+00:00'))
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid earliest_departure format")
+        earliest = _parse_datetime(earliest_departure, "Invalid earliest_departure format")
     
     if latest_arrival:
-        try:
-            latest = datetime.fromisoformat(latest_arrival.replace('Z', '+00:00'))
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid latest_arrival format")
+        latest = _parse_datetime(latest_arrival, "Invalid latest_arrival format")
     
-    result = travel_predictor.find_optimal_departure_time(
+    result = await asyncio.to_thread(
+        travel_predictor.find_optimal_departure_time,
         start, end, earliest, latest, hours_window
     )
     
@@ -146,8 +287,8 @@ def get_optimal_departure(
     return result
 
 
-@router.get("/travel-time/forecast", tags=["travel-time"])
-def get_travel_time_forecast(
+@router.get("/travel-time/forecast", response_class=ORJSONResponse, tags=["travel-time"])
+async def get_travel_time_forecast(
     start: str,
     end: str,
     hours: int = 24
@@ -159,15 +300,15 @@ def get_travel_time_forecast(
     - **end**: Zielort
     - **hours**: Anzahl Stunden (default: 24, max: 48)
     """
-    if not road_network.has_location(start):
-        raise HTTPException(status_code=404, detail=f"Start location '{start}' not found")
-    if not road_network.has_location(end):
-        raise HTTPException(status_code=404, detail=f"End location '{end}' not found")
+    _ensure_locations(start, end)
     
     if hours > 48:
         raise HTTPException(status_code=400, detail="Maximum 48 hours forecast")
     
-    forecast = travel_predictor.get_hourly_forecast(start, end, hours)
+    timestamps = np.arange(hours, dtype=np.int64)
+    forecast = await asyncio.to_thread(
+        travel_predictor.get_hourly_forecast_batch, start, end, timestamps
+    )
     
     return {
         "start": start,
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -32,10 +32,28 @@ class Settings(BaseSettings):
     RL_EPISODES: int = 100
     RL_EPSILON: float = 0.1
     RL_GAMMA: float = 0.9
+    RL_REPLAY_SIZE: int = 10000
+    RL_BATCH_SIZE: int = 64
+    RL_QUANTIZE: bool = True
+    # torch.compile für das Training (fällt ohne C++-Toolchain automatisch auf eager zurück)
+    RL_TORCH_COMPILE: bool = True
+    # Actor/Learner-Training: Actor-Prozesse und Gewichts-Sync alle N Learner-Updates
+    RL_NUM_ACTORS: int = 4
+    RL_SYNC_EVERY: int = 50
     
     # Autobahn API
     AUTOBAHN_API_URL: str = "https://verkehr.autobahn.de/o/autobahn/"
     AUTOBAHN_TIMEOUT: int = 5
+    TRAFFIC_CACHE_TTL: int = 30
+    
+    # Redis (optional, geteilter Routen-Cache über alle Worker)
+    REDIS_URL: Optional[str] = None
+    ROUTE_CACHE_TTL: int = 3600
+    # Prozesslokaler Routen-Cache (kurzlebig, da Routen vom Live-Traffic abhängen)
+    ROUTE_LOCAL_CACHE_TTL: int = 60
+    # Micro-Batching gleichzeitiger /route/optimize-Requests
+    ROUTE_BATCH_MAX_SIZE: int = 32
+    ROUTE_BATCH_MAX_WAIT_MS: float = 5.0
     
     # Graph Network Config
     GRAPH_HIDDEN_DIM: int = 32
@@ -1,21 +1,67 @@
+import logging
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+import httpx
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
 from app.api.v1 import endpoints
+from app.services.traffic_api import traffic_client
+from app.services.rl_agent import RLAgent, configure_torch
+from app.services.route_batcher import RouteBatcher
+
+try:
+    import redis.asyncio as aioredis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+logging.basicConfig(level=logging.INFO, handlers=[logging.StreamHandler()])
+logger = logging.getLogger("routy")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Lifespan context manager for startup/shutdown events"""
     # Startup
-    print(f"🚀 {settings.PROJECT_NAME} v{settings.VERSION} starting...")
-    print(f"📍 API Prefix: {settings.API_V1_PREFIX}")
-    print(f"🌐 CORS Origins: {settings.ALLOWED_ORIGINS}")
+    logger.info("🚀 %s v%s starting...", settings.PROJECT_NAME, settings.VERSION)
+    logger.info("📍 API Prefix: %s", settings.API_V1_PREFIX)
+    logger.info("🌐 CORS Origins: %s", settings.ALLOWED_ORIGINS)
+    
+    # Geteilter HTTP-Client für async Autobahn-API Requests
+    app.state.http_client = httpx.AsyncClient(timeout=settings.AUTOBAHN_TIMEOUT)
+    traffic_client.async_client = app.state.http_client
+    
+    # Redis-Cache nur wenn konfiguriert, sonst bleibt es beim prozesslokalen LRU
+    app.state.redis = None
+    if settings.REDIS_URL:
+        if REDIS_AVAILABLE:
+            app.state.redis = aioredis.from_url(settings.REDIS_URL)
+            logger.info("🗄️ Redis-Cache: %s", settings.REDIS_URL)
+        else:
+            logger.warning("REDIS_URL gesetzt, aber redis ist nicht installiert - nutze lokalen Cache")
+    
+    # Agent vorab erzeugen und Q-Netz für Single-Sample-Inferenz vorbereiten
+    configure_torch(num_threads=1)
+    app.state.agent = RLAgent()
+    app.state.agent.optimize_for_inference()
+    
+    # Gleichzeitige Routen-Requests werden gebündelt vorhergesagt
+    app.state.route_batcher = RouteBatcher(
+        app.state.agent,
+        max_batch_size=settings.ROUTE_BATCH_MAX_SIZE,
+        max_wait=settings.ROUTE_BATCH_MAX_WAIT_MS / 1000
+    )
+    app.state.route_batcher.start()
     
     yield
     
     # Shutdown
-    print("🛑 Shutting down...")
+    logger.info("🛑 Shutting down...")
+    await app.state.route_batcher.stop()
+    await traffic_client.aclose()
+    if app.state.redis is not None:
+        await app.state.redis.aclose()
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -25,6 +71,7 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_PREFIX}/openapi.json",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -38,19 +85,22 @@ app.add_middleware(
 )
 
 # Root health check
+# Konstante Antwort, einmal serialisiert (häufig gepollt, z.B. k8s-Probes)
+_HEALTH_BYTES = orjson.dumps({
+    "status": "ok",
+    "service": settings.PROJECT_NAME,
+    "version": settings.VERSION
+})
+
 @app.get("/health", tags=["monitoring"])
-def health_check():
+async def health_check():
     """
     Health-Check Endpunkt.
     
     Returns:
         Status, Service-Name und Version
     """
-    return {
-        "status": "ok",
-        "service": settings.PROJECT_NAME,
-        "version": settings.VERSION
-    }
+    return Response(_HEALTH_BYTES, media_type="application/json")
 
 # Include API routers
 app.include_router(
@@ -60,10 +110,15 @@ app.include_router(
 )
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        # uvloop ist unter Windows nicht verfügbar
+        loop="uvloop" if sys.platform != "win32" else "asyncio",
+        http="httptools",
+        log_level="info"
     )
\ No newline at end of file
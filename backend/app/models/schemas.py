@@ -3,6 +3,9 @@ from typing import List, Optional
 
 class Order(BaseModel):
     model_config = ConfigDict(
+        frozen=True,
+        extra='ignore',
+        revalidate_instances='never',
         json_schema_extra={
             "example": {
                 "order_id": 1,
@@ -19,20 +22,28 @@ class Order(BaseModel):
     priority: Optional[int] = Field(1, ge=1, le=10, description="Priority (1=highest)")
 
 class Vehicle(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore', revalidate_instances='never')
+    
     vehicle_id: str
     capacity: Optional[int] = 100
 
 class Stop(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore', revalidate_instances='never')
+    
     location: str
     eta_minutes: Optional[int] = None
 
 class RouteResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore', revalidate_instances='never')
+    
     route_id: str
     stops: List[str]
     estimated_duration_minutes: int
     total_orders: int
 
 class StatsResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, extra='ignore', revalidate_instances='never')
+    
     total_routes_optimized: int
     avg_duration_minutes: float
     total_orders_processed: int
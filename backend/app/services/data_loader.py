@@ -1,16 +1,183 @@
 import csv
 import json
-from typing import List
+from typing import Any, Iterator, List, Optional
 from pathlib import Path
 from app.models.schemas import Order, Vehicle
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+# Ab dieser Dateigröße wird JSON inkrementell geparst statt komplett geladen
+STREAM_THRESHOLD_BYTES = 32 * 1024 * 1024
+
+
+def _read_json(file_path: Path) -> Any:
+    """Liest eine JSON-Datei, bevorzugt mit orjson (schnellerer Parser)."""
+    if orjson is not None:
+        with open(file_path, 'rb') as jsonfile:
+            return orjson.loads(jsonfile.read())
+    with open(file_path, 'r', encoding='utf-8') as jsonfile:
+        return json.load(jsonfile)
+
+
+def _iter_json_items(file_path: Path, key: str) -> Iterator[Any]:
+    """
+    Iteriert über die Einträge eines JSON-Arrays (Top-Level oder unter `key`).
+    
+    Große Dateien werden mit ijson gestreamt, damit nie der komplette
+    Dokument-Baum im Speicher liegt. Kleine Dateien (oder ohne ijson)
+    werden in einem Stück geparst.
+    """
+    if ijson is None or file_path.stat().st_size < STREAM_THRESHOLD_BYTES:
+        data = _read_json(file_path)
+        yield from (data if isinstance(data, list) else data.get(key, []))
+        return
+    
+    with open(file_path, 'rb') as jsonfile:
+        # Erstes Nicht-Whitespace-Byte entscheidet: Array oder Objekt
+        first = jsonfile.read(64).lstrip()[:1]
+        jsonfile.seek(0)
+        prefix = 'item' if first == b'[' else f'{key}.item'
+        yield from ijson.items(jsonfile, prefix)
+
+
+def _header_indices(idx: dict, *names: str) -> List[int]:
+    """Positionen der vorhandenen Spalten in Prioritätsreihenfolge."""
+    return [idx[name] for name in names if name in idx]
+
+
+def _first_value(row: List[str], cols: List[int], default: Any) -> Any:
+    """Erster nicht-leere Wert aus den angegebenen Spalten, sonst default."""
+    for i in cols:
+        if row[i]:
+            return row[i]
+    return default
+
+
+# Blockgröße für den gestreamten CSV-Reader (große Dateien)
+CSV_BLOCK_SIZE_BYTES = 16 * 1024 * 1024
+
+_ORDER_COLUMN_TYPES = {
+    "order_id": "int64",
+    "id": "int64",
+    "priority": "int64",
+    "start_location": "string",
+    "start": "string",
+    "end_location": "string",
+    "end": "string",
+}
+_VEHICLE_COLUMN_TYPES = {"vehicle_id": "string", "capacity": "int64"}
+
+
+def _read_csv_batches(file_path: Path, column_types: dict) -> Iterator[Any]:
+    """
+    Liest eine CSV-Datei mit PyArrow in typisierte Spalten-Blöcke.
+    
+    Kleine Dateien werden in einem Stück (multithreaded) gelesen; große
+    Dateien blockweise gestreamt, sodass nie die ganze Datei als Tabelle
+    im Speicher liegt.
+    """
+    convert_options = pa_csv.ConvertOptions(
+        column_types={name: pa.type_for_alias(alias) for name, alias in column_types.items()}
+    )
+    if file_path.stat().st_size < STREAM_THRESHOLD_BYTES:
+        yield pa_csv.read_csv(file_path, convert_options=convert_options)
+        return
+    
+    yield from pa_csv.open_csv(
+        file_path,
+        read_options=pa_csv.ReadOptions(block_size=CSV_BLOCK_SIZE_BYTES),
+        convert_options=convert_options
+    )
+
+
+def _column(block: Any, name: str) -> List[Optional[Any]]:
+    """Spalte als Python-Liste, fehlende Spalten als None-Liste."""
+    if name in block.schema.names:
+        return block.column(name).to_pylist()
+    return [None] * block.num_rows
+
+
+def _read_parquet(file_path: Path, columns: List[str]) -> "pa.Table":
+    """Liest nur die benötigten (vorhandenen) Spalten einer Parquet-Datei."""
+    if not PYARROW_AVAILABLE:
+        raise ValueError("Parquet support requires pyarrow")
+    if not file_path.exists():
+        raise FileNotFoundError(f"File not found: {file_path}")
+    available = set(pq.read_schema(file_path).names)
+    return pq.read_table(file_path, columns=[c for c in columns if c in available])
+
+
+def _orders_from_columns(block: Any) -> List[Order]:
+    """Baut Orders aus einer Arrow-Tabelle bzw. einem RecordBatch."""
+    ids = [a or b or 0 for a, b in zip(_column(block, "order_id"), _column(block, "id"))]
+    starts = [a or b or "" for a, b in zip(_column(block, "start_location"), _column(block, "start"))]
+    ends = [a or b or "" for a, b in zip(_column(block, "end_location"), _column(block, "end"))]
+    if "priority" in block.schema.names:
+        priorities = block.column("priority").to_pylist()
+    else:
+        priorities = [1] * block.num_rows
+    
+    orders: List[Order] = []
+    for order_id, start, end, priority in zip(ids, starts, ends, priorities):
+        if priority is None:
+            # Leere Priorität gilt wie im csv-Pfad als fehlerhafte Zeile
+            continue
+        try:
+            orders.append(Order(
+                order_id=order_id,
+                start_location=start,
+                end_location=end,
+                priority=priority
+            ))
+        except ValueError:
+            continue
+    
+    return orders
+
+
+def _vehicles_from_columns(block: Any) -> List[Vehicle]:
+    """Baut Vehicles aus einer Arrow-Tabelle bzw. einem RecordBatch."""
+    vehicle_ids = [v or "" for v in _column(block, "vehicle_id")]
+    if "capacity" in block.schema.names:
+        capacities = block.column("capacity").to_pylist()
+    else:
+        capacities = [100] * block.num_rows
+    
+    return [
+        Vehicle(vehicle_id=vehicle_id, capacity=capacity)
+        for vehicle_id, capacity in zip(vehicle_ids, capacities)
+        if capacity is not None
+    ]
+
 class DataLoader:
     """
     Lädt Daten aus CSV und JSON Dateien.
     
     Unterstützt:
-    - Order-Daten (CSV/JSON)
-    - Vehicle-Daten (CSV/JSON)
+    - Order-Daten (CSV/JSON/Parquet)
+    - Vehicle-Daten (CSV/JSON/Parquet)
+    
+    Für wiederholt geladene Bestände lohnt eine einmalige Migration nach
+    Parquet (typisierte, komprimierte Spalten, Dictionary-Encoding der Orte):
+    
+        loader = DataLoader()
+        loader.save_orders_parquet(loader.load_orders("orders.csv"), "orders.parquet")
     """
     
     def __init__(self):
@@ -21,7 +188,7 @@ class DataLoader:
         Lade Aufträge aus CSV oder JSON.
         
         Args:
-            file_path: Pfad zur Datei (CSV oder JSON)
+            file_path: Pfad zur Datei (CSV, JSON oder Parquet)
         
         Returns:
             Liste von Order-Objekten
@@ -32,28 +199,49 @@ class DataLoader:
             return self._load_orders_csv(file_path)
         elif file_path.suffix.lower() == ".json":
             return self._load_orders_json(file_path)
+        elif file_path.suffix.lower() in (".parquet", ".pq"):
+            return _orders_from_columns(_read_parquet(file_path, list(_ORDER_COLUMN_TYPES)))
         else:
             raise ValueError(f"Unsupported file format: {file_path.suffix}")
 
     def _load_orders_csv(self, file_path: Path) -> List[Order]:
         """
         Lade Orders aus CSV-Datei.
+        
+        Mit PyArrow werden Tokenisierung und int-Parsing spaltenweise in C++
+        erledigt; bei nicht typkonformen Zeilen (oder ohne PyArrow) greift der
+        zeilenweise csv-Fallback, der fehlerhafte Zeilen überspringt.
         """
+        if PYARROW_AVAILABLE:
+            try:
+                return self._load_orders_arrow(file_path)
+            except pa.ArrowInvalid:
+                pass
+            except FileNotFoundError:
+                raise FileNotFoundError(f"File not found: {file_path}")
+        
         orders: List[Order] = []
         
         try:
             with open(file_path, newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
+                # Spaltenpositionen einmal aus dem Header, danach nur Listen-Indexing
+                reader = csv.reader(csvfile)
+                idx = {name: i for i, name in enumerate(next(reader, []))}
+                id_cols = _header_indices(idx, "order_id", "id")
+                start_cols = _header_indices(idx, "start_location", "start")
+                end_cols = _header_indices(idx, "end_location", "end")
+                priority_i = idx.get("priority")
+                
                 for row in reader:
                     try:
                         order = Order(
-                            order_id=int(row.get("order_id", 0) or row.get("id", 0)),
-                            start_location=row.get("start_location") or row.get("start", ""),
-                            end_location=row.get("end_location") or row.get("end", ""),
-                            priority=int(row.get("priority", 1))
+                            order_id=int(_first_value(row, id_cols, 0)),
+                            start_location=_first_value(row, start_cols, ""),
+                            end_location=_first_value(row, end_cols, ""),
+                            priority=int(row[priority_i]) if priority_i is not None else 1
                         )
                         orders.append(order)
-                    except (ValueError, KeyError):
+                    except (ValueError, IndexError):
                         # Skip malformed rows
                         continue
         except FileNotFoundError:
@@ -61,6 +249,13 @@ class DataLoader:
         
         return orders
 
+    def _load_orders_arrow(self, file_path: Path) -> List[Order]:
+        """Lade Orders spaltenweise (bzw. blockweise) über PyArrow."""
+        orders: List[Order] = []
+        for block in _read_csv_batches(file_path, _ORDER_COLUMN_TYPES):
+            orders.extend(_orders_from_columns(block))
+        return orders
+
     def _load_orders_json(self, file_path: Path) -> List[Order]:
         """
         Lade Orders aus JSON-Datei.
@@ -68,28 +263,36 @@ class DataLoader:
         orders: List[Order] = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as jsonfile:
-                data = json.load(jsonfile)
-                
-                # Handle both array and object with 'orders' key
-                orders_data = data if isinstance(data, list) else data.get("orders", [])
-                
-                for item in orders_data:
-                    try:
-                        order = Order(
-                            order_id=int(item.get("order_id", 0) or item.get("id", 0)),
-                            start_location=item.get("start_location") or item.get("start", ""),
-                            end_location=item.get("end_location") or item.get("end", ""),
-                            priority=int(item.get("priority", 1))
-                        )
-                        orders.append(order)
-                    except (ValueError, KeyError):
-                        continue
+            # Handle both array and object with 'orders' key
+            for item in _iter_json_items(file_path, "orders"):
+                try:
+                    order = Order(
+                        order_id=int(item.get("order_id", 0) or item.get("id", 0)),
+                        start_location=item.get("start_location") or item.get("start", ""),
+                        end_location=item.get("end_location") or item.get("end", ""),
+                        priority=int(item.get("priority", 1))
+                    )
+                    orders.append(order)
+                except (ValueError, KeyError):
+                    continue
         except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {file_path}")
         
         return orders
 
+    def save_orders_parquet(self, orders: List[Order], file_path: str):
+        """
+        Speichert Aufträge als Parquet-Datei (zstd-komprimiert).
+        
+        Args:
+            orders: Liste von Order-Objekten
+            file_path: Zielpfad
+        """
+        if not PYARROW_AVAILABLE:
+            raise ValueError("Parquet support requires pyarrow")
+        table = pa.Table.from_pylist([order.model_dump() for order in orders])
+        pq.write_table(table, file_path, compression="zstd")
+
     def load_vehicles(self, file_path: str) -> List[Vehicle]:
         """
         Lade Fahrzeuge aus CSV oder JSON.
@@ -106,49 +309,65 @@ class DataLoader:
             return self._load_vehicles_csv(file_path)
         elif file_path.suffix.lower() == ".json":
             return self._load_vehicles_json(file_path)
+        elif file_path.suffix.lower() in (".parquet", ".pq"):
+            return _vehicles_from_columns(_read_parquet(file_path, list(_VEHICLE_COLUMN_TYPES)))
         else:
             raise ValueError(f"Unsupported file format: {file_path.suffix}")
 
     def _load_vehicles_csv(self, file_path: Path) -> List[Vehicle]:
-        """Lade Fahrzeuge aus CSV."""
+        """Lade Fahrzeuge aus CSV (PyArrow, sonst zeilenweise)."""
+        if PYARROW_AVAILABLE:
+            try:
+                return self._load_vehicles_arrow(file_path)
+            except pa.ArrowInvalid:
+                pass
+            except FileNotFoundError:
+                raise FileNotFoundError(f"File not found: {file_path}")
+        
         vehicles: List[Vehicle] = []
         
         try:
             with open(file_path, newline='', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
+                reader = csv.reader(csvfile)
+                idx = {name: i for i, name in enumerate(next(reader, []))}
+                vehicle_id_i = idx.get("vehicle_id")
+                capacity_i = idx.get("capacity")
+                
                 for row in reader:
                     try:
                         vehicle = Vehicle(
-                            vehicle_id=row.get("vehicle_id", ""),
-                            capacity=int(row.get("capacity", 100))
+                            vehicle_id=row[vehicle_id_i] if vehicle_id_i is not None else "",
+                            capacity=int(row[capacity_i]) if capacity_i is not None else 100
                         )
                         vehicles.append(vehicle)
-                    except ValueError:
+                    except (ValueError, IndexError):
                         continue
         except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {file_path}")
         
         return vehicles
 
+    def _load_vehicles_arrow(self, file_path: Path) -> List[Vehicle]:
+        """Lade Fahrzeuge spaltenweise (bzw. blockweise) über PyArrow."""
+        vehicles: List[Vehicle] = []
+        for block in _read_csv_batches(file_path, _VEHICLE_COLUMN_TYPES):
+            vehicles.extend(_vehicles_from_columns(block))
+        return vehicles
+
     def _load_vehicles_json(self, file_path: Path) -> List[Vehicle]:
         """Lade Fahrzeuge aus JSON."""
         vehicles: List[Vehicle] = []
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as jsonfile:
-                data = json.load(jsonfile)
-                
-                vehicles_data = data if isinstance(data, list) else data.get("vehicles", [])
-                
-                for item in vehicles_data:
-                    try:
-                        vehicle = Vehicle(
-                            vehicle_id=item.get("vehicle_id", ""),
-                            capacity=int(item.get("capacity", 100))
-                        )
-                        vehicles.append(vehicle)
-                    except ValueError:
-                        continue
+            for item in _iter_json_items(file_path, "vehicles"):
+                try:
+                    vehicle = Vehicle(
+                        vehicle_id=item.get("vehicle_id", ""),
+                        capacity=int(item.get("capacity", 100))
+                    )
+                    vehicles.append(vehicle)
+                except ValueError:
+                    continue
         except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {file_path}")
         
@@ -1,6 +1,15 @@
-from typing import Any, Dict, List, Tuple
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Dict, List, Tuple, Union
+import numpy as np
 from app.models.schemas import Order
 
+# Numerische State-Felder, die SubprocVecTourEnvironment über Shared Memory austauscht
+_STATE_FIELDS = ("time", "orders_left", "assigned_orders_count", "total_reward")
+
+# State als Dict (Default) oder als NumPy-Vektor in _STATE_FIELDS-Reihenfolge (array_state=True)
+State = Union[Dict[str, Any], np.ndarray]
+
 class TourEnvironment:
     """
     Simulationsumgebung für RL-Training.
@@ -12,13 +21,18 @@ class TourEnvironment:
     - Reward-Berechnung
     """
     
-    def __init__(self, orders: List[Order] | None = None, max_time_steps: int = 1000):
+    def __init__(self, orders: List[Order] | None = None, max_time_steps: int = 1000, array_state: bool = False):
         """
         Initialisiere die Tour-Umgebung.
         
         Args:
             orders: Liste von Order-Objekten
             max_time_steps: Maximale Anzahl von Zeitschritten
+            array_state: reset()/step() liefern statt eines Dicts eine
+                schreibgeschützte Sicht auf einen einmal allokierten
+                float32-Vektor (Felder wie _STATE_FIELDS). Spart im
+                Trainings-Loop die Dict-Allokation pro Schritt; die Sicht
+                wird beim nächsten Schritt überschrieben.
         """
         self.orders = orders or []
         self.max_time_steps = max_time_steps
@@ -26,8 +40,12 @@ class TourEnvironment:
         self.vehicles: List[Dict[str, Any]] = []
         self.assigned_orders: Dict[int, int] = {}  # order_id -> vehicle_id mapping
         self.total_reward = 0.0
+        self.array_state = array_state
+        self._state_buf = np.zeros(len(_STATE_FIELDS), dtype=np.float32)
+        self._state_view = self._state_buf.view()
+        self._state_view.flags.writeable = False
 
-    def reset(self) -> Dict[str, Any]:
+    def reset(self) -> State:
         """
         Setze die Umgebung zurück auf Initial-State.
         
@@ -37,17 +55,25 @@ class TourEnvironment:
         self.time = 0
         self.assigned_orders = {}
         self.total_reward = 0.0
-        return self.get_state()
+        return self._observe()
 
-    def step(self, action: Dict[str, Any]) -> Tuple[Dict[str, Any], float, bool]:
+    def step(self, action: Dict[str, Any]) -> Tuple[State, float, bool, bool, Dict[str, Any]]:
         """
         Führe einen Schritt in der Umgebung aus.
         
+        Endet die Episode, wird die Umgebung automatisch zurückgesetzt
+        (Autoreset): state ist dann bereits der Initial-State der neuen
+        Episode, der State direkt nach dem Schritt steht in
+        info['final_observation'].
+        
         Args:
             action: Action-Dict z.B. {'assign': {'order_id': 1, 'vehicle_id': 'v1'}}
         
         Returns:
-            (state, reward, done)
+            (state, reward, terminated, truncated, info)
+            - terminated: Terminal-State erreicht (keine Aufträge); nur dann
+              darf beim Q-Learning nicht gebootstrapped werden
+            - truncated: Zeitlimit (max_time_steps) erreicht
         """
         self.time += 1
         
@@ -56,21 +82,43 @@ class TourEnvironment:
         self.total_reward += reward
         
         # Prüfe ob Episode beendet
-        done = self.time >= self.max_time_steps or len(self.orders) == 0
+        terminated = len(self.orders) == 0
+        truncated = not terminated and self.time >= self.max_time_steps
         
-        return self.get_state(), reward, done
+        state = self._observe()
+        info: Dict[str, Any] = {}
+        if terminated or truncated:
+            # Der State-Puffer wird vom Reset überschrieben, daher kopieren
+            info["final_observation"] = state.copy() if self.array_state else state
+            state = self.reset()
+        
+        return state, reward, terminated, truncated, info
 
-    def _compute_reward(self, action: Dict[str, Any]) -> float:
+    def _compute_reward(self, action: Dict[str, Any] | int) -> float:
         """
         Berechne Reward für eine Action.
         
         MVP-Logik: Einfache Heuristik
         - +1 für valide Assignment
         - -0.5 für ungültige Assignment
+        
+        Action-Indizes (DQN) gelten als valide, wenn sie in
+        get_possible_actions() enthalten sind.
         """
-        if action.get("assign"):
-            return 1.0
-        return -0.5
+        if isinstance(action, dict):
+            return 1.0 if action.get("assign") else -0.5
+        return 1.0 if 0 <= action < max(len(self.vehicles), 1) else -0.5
+
+    def _observe(self) -> State:
+        """State im konfigurierten Format (Dict oder Puffer-Sicht)."""
+        if not self.array_state:
+            return self.get_state()
+        buf = self._state_buf
+        buf[0] = self.time
+        buf[1] = len(self.orders)
+        buf[2] = len(self.assigned_orders)
+        buf[3] = self.total_reward
+        return self._state_view
 
     def get_state(self) -> Dict[str, Any]:
         """
@@ -112,4 +160,243 @@ class TourEnvironment:
         """
         if not self.vehicles:
             return [0]  # Default action
-        return list(range(len(self.vehicles)))
\ No newline at end of file
+        return list(range(len(self.vehicles)))
+
+class VecTourEnvironment:
+    """
+    Synchrone Vektor-Umgebung aus mehreren TourEnvironment-Kopien.
+    
+    Alle Teil-Umgebungen werden pro Aufruf gemeinsam geschrittet, damit der
+    Agent eine Action pro Umgebung aus einem gebatchten Forward-Pass
+    bestimmen kann. Beendete Teil-Umgebungen werden automatisch
+    zurückgesetzt (Autoreset).
+    """
+    
+    def __init__(self, orders: List[Order] | None = None, num_envs: int = 8, max_time_steps: int = 1000):
+        """
+        Initialisiere die Vektor-Umgebung.
+        
+        Args:
+            orders: Liste von Order-Objekten (jede Teil-Umgebung erhält eine eigene Liste)
+            num_envs: Anzahl paralleler Teil-Umgebungen
+            max_time_steps: Maximale Anzahl von Zeitschritten pro Episode
+        """
+        self.num_envs = num_envs
+        self.envs = [
+            TourEnvironment(list(orders or []), max_time_steps=max_time_steps)
+            for _ in range(num_envs)
+        ]
+
+    def reset(self) -> List[Dict[str, Any]]:
+        """
+        Setze alle Teil-Umgebungen zurück.
+        
+        Returns:
+            Liste der Initial-States (einer pro Teil-Umgebung)
+        """
+        return [env.reset() for env in self.envs]
+
+    def step(self, actions: List[Any]) -> Tuple[List[Dict[str, Any]], np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        """
+        Führe in jeder Teil-Umgebung einen Schritt aus.
+        
+        Args:
+            actions: Eine Action pro Teil-Umgebung
+        
+        Returns:
+            (states, rewards, dones, terminated, final_states)
+            - states: States nach dem Schritt, für beendete Episoden bereits
+              der Initial-State der neuen Episode
+            - dones: Episode beendet (Terminal-State oder Zeitlimit)
+            - terminated: Episode durch Terminal-State beendet; nur dann
+              darf beim Q-Learning nicht gebootstrapped werden
+            - final_states: States direkt nach dem Schritt (vor Autoreset),
+              als next_state für den Replay Buffer
+        """
+        states: List[Dict[str, Any]] = []
+        final_states: List[Dict[str, Any]] = []
+        rewards = np.zeros(self.num_envs, dtype=np.float32)
+        dones = np.zeros(self.num_envs, dtype=bool)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        
+        for i, (env, action) in enumerate(zip(self.envs, actions)):
+            state, reward, terminated[i], truncated, info = env.step(action)
+            rewards[i] = reward
+            dones[i] = terminated[i] or truncated
+            final_states.append(info.get("final_observation", state))
+            states.append(state)
+        
+        return states, rewards, dones, terminated, final_states
+
+    def get_possible_actions(self) -> List[int]:
+        """
+        Gibt die möglichen Aktionen zurück (für alle Teil-Umgebungen gleich).
+        """
+        return self.envs[0].get_possible_actions()
+
+
+def _subproc_worker(remote, parent_remote, orders, max_time_steps: int, shm_name: str, num_envs: int, index: int):
+    """
+    Kindprozess von SubprocVecTourEnvironment.
+    
+    Hält eine eigene TourEnvironment und bearbeitet Kommandos aus der Pipe.
+    States werden in den Shared-Memory-Block geschrieben (Zeile 0: aktueller
+    State nach Autoreset, Zeile 1: State vor Autoreset); über die Pipe gehen
+    nur Reward- und Done-Flags zurück.
+    """
+    parent_remote.close()
+    shm = SharedMemory(name=shm_name)
+    buf = np.ndarray((2, num_envs, len(_STATE_FIELDS)), dtype=np.float64, buffer=shm.buf)
+    env = TourEnvironment(orders, max_time_steps=max_time_steps, array_state=True)
+    
+    def write(row: int, state: np.ndarray):
+        buf[row, index] = state
+    
+    try:
+        while True:
+            cmd, data = remote.recv()
+            if cmd == "step":
+                state, reward, terminated, truncated, info = env.step(data)
+                write(1, info.get("final_observation", state))
+                write(0, state)
+                remote.send((reward, terminated or truncated, terminated))
+            elif cmd == "reset":
+                write(0, env.reset())
+                remote.send(None)
+            elif cmd == "get_possible_actions":
+                remote.send(env.get_possible_actions())
+            elif cmd == "close":
+                break
+    finally:
+        del buf
+        shm.close()
+        remote.close()
+
+
+class SubprocVecTourEnvironment:
+    """
+    Vektor-Umgebung mit einem Prozess pro TourEnvironment.
+    
+    Gleiche Schnittstelle wie VecTourEnvironment, aber die Teil-Umgebungen
+    laufen in eigenen Prozessen und damit ohne GIL parallel. Kommandos gehen
+    über multiprocessing.Pipe, die States als flaches Float-Array über
+    Shared Memory (kein Pickling der State-Dicts).
+    
+    Die Teil-Umgebungen haben keine Fahrzeuge; zurückgegeben werden die
+    numerischen State-Felder (_STATE_FIELDS). Nach Gebrauch close() aufrufen
+    oder als Context Manager verwenden.
+    """
+    
+    def __init__(
+        self,
+        orders: List[Order] | None = None,
+        num_envs: int = 8,
+        max_time_steps: int = 1000,
+        start_method: str | None = None
+    ):
+        """
+        Startet die Kindprozesse.
+        
+        Args:
+            orders: Liste von Order-Objekten
+            num_envs: Anzahl paralleler Teil-Umgebungen (= Prozesse)
+            max_time_steps: Maximale Anzahl von Zeitschritten pro Episode
+            start_method: multiprocessing-Startmethode (default: Plattform-Standard)
+        """
+        self.num_envs = num_envs
+        ctx = multiprocessing.get_context(start_method)
+        shape = (2, num_envs, len(_STATE_FIELDS))
+        self._shm = SharedMemory(create=True, size=int(np.prod(shape)) * np.dtype(np.float64).itemsize)
+        self._buf = np.ndarray(shape, dtype=np.float64, buffer=self._shm.buf)
+        
+        self.remotes = []
+        self.processes = []
+        for index in range(num_envs):
+            remote, worker_remote = ctx.Pipe()
+            process = ctx.Process(
+                target=_subproc_worker,
+                args=(worker_remote, remote, list(orders or []), max_time_steps,
+                      self._shm.name, num_envs, index),
+                daemon=True
+            )
+            process.start()
+            worker_remote.close()
+            self.remotes.append(remote)
+            self.processes.append(process)
+        self.closed = False
+
+    def _states(self, row: int) -> List[Dict[str, Any]]:
+        """Baut State-Dicts aus einer Zeile des Shared-Memory-Blocks."""
+        states = []
+        for values in self._buf[row].tolist():
+            state = dict(zip(_STATE_FIELDS, values))
+            state["time"] = int(state["time"])
+            state["orders_left"] = int(state["orders_left"])
+            state["assigned_orders_count"] = int(state["assigned_orders_count"])
+            state["vehicles"] = []
+            states.append(state)
+        return states
+
+    def reset(self) -> List[Dict[str, Any]]:
+        """
+        Setze alle Teil-Umgebungen zurück.
+        
+        Returns:
+            Liste der Initial-States (einer pro Teil-Umgebung)
+        """
+        for remote in self.remotes:
+            remote.send(("reset", None))
+        for remote in self.remotes:
+            remote.recv()
+        return self._states(0)
+
+    def step(self, actions: List[Any]) -> Tuple[List[Dict[str, Any]], np.ndarray, np.ndarray, np.ndarray, List[Dict[str, Any]]]:
+        """
+        Führe in jeder Teil-Umgebung parallel einen Schritt aus.
+        
+        Args:
+            actions: Eine Action pro Teil-Umgebung
+        
+        Returns:
+            (states, rewards, dones, terminated, final_states) wie
+            VecTourEnvironment.step()
+        """
+        for remote, action in zip(self.remotes, actions):
+            remote.send(("step", action))
+        results = [remote.recv() for remote in self.remotes]
+        
+        rewards = np.array([r[0] for r in results], dtype=np.float32)
+        dones = np.array([r[1] for r in results], dtype=bool)
+        terminated = np.array([r[2] for r in results], dtype=bool)
+        return self._states(0), rewards, dones, terminated, self._states(1)
+
+    def get_possible_actions(self) -> List[int]:
+        """
+        Gibt die möglichen Aktionen zurück (für alle Teil-Umgebungen gleich).
+        """
+        self.remotes[0].send(("get_possible_actions", None))
+        return self.remotes[0].recv()
+
+    def close(self):
+        """Beendet die Kindprozesse und gibt den Shared Memory frei."""
+        if self.closed:
+            return
+        for remote in self.remotes:
+            try:
+                remote.send(("close", None))
+            except (BrokenPipeError, EOFError):
+                pass
+        for process in self.processes:
+            process.join(timeout=5)
+        for remote in self.remotes:
+            remote.close()
+        del self._buf
+        self._shm.close()
+        self._shm.unlink()
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,298 @@
+"""
+Prozessübergreifender Replay Buffer und Policy-Gewichte für Actor/Learner-Training
+(Ape-X-Muster: mehrere Actor-Prozesse sammeln Erfahrungen, ein Learner trainiert)
+"""
+import multiprocessing
+import os
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, List, Optional, Tuple
+import numpy as np
+
+from app.models.schemas import Order
+from app.services.environment import TourEnvironment
+
+
+class SharedReplayBuffer:
+    """
+    Replay-Ringpuffer in Shared Memory.
+    
+    Spaltenweise Arrays (states, next_states, actions, rewards, dones) in
+    einem einzigen SharedMemory-Block; Actor-Prozesse schreiben Übergänge
+    unter dem Lock des gemeinsamen Zählers, der Learner zieht Minibatches
+    per Fancy-Indexing unter demselben Lock. So zählt ein Slot erst als
+    gültig, wenn er vollständig geschrieben ist. Wird als Process-Argument an Kindprozesse
+    übergeben (dort nur angehängt, nicht besessen).
+    """
+    
+    def __init__(self, capacity: int, state_dim: int, ctx=None):
+        """
+        Args:
+            capacity: Maximale Anzahl gespeicherter Übergänge
+            state_dim: Länge eines State-Vektors
+            ctx: multiprocessing-Kontext (default: Plattform-Standard)
+        """
+        ctx = ctx or multiprocessing.get_context()
+        self.capacity = capacity
+        self.state_dim = state_dim
+        # Anzahl bisher geschriebener Übergänge (Slot = Zähler % capacity)
+        self._count = ctx.Value('q', 0)
+        self._shm = SharedMemory(create=True, size=self._nbytes())
+        # Nur der erzeugende Prozess gibt den Block frei (auch bei fork-Kindern)
+        self._owner_pid = os.getpid()
+        self._attach()
+    
+    def _layout(self) -> List[Tuple[str, Tuple[int, ...], Any]]:
+        return [
+            ("states", (self.capacity, self.state_dim), np.float32),
+            ("next_states", (self.capacity, self.state_dim), np.float32),
+            ("actions", (self.capacity,), np.int64),
+            ("rewards", (self.capacity,), np.float32),
+            ("dones", (self.capacity,), np.float32),
+        ]
+    
+    def _nbytes(self) -> int:
+        return sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for _, shape, dtype in self._layout())
+    
+    def _attach(self):
+        """Legt die NumPy-Sichten auf den Shared-Memory-Block an."""
+        offset = 0
+        for name, shape, dtype in self._layout():
+            array = np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offset)
+            setattr(self, name, array)
+            offset += array.nbytes
+    
+    def __getstate__(self):
+        return {
+            "capacity": self.capacity,
+            "state_dim": self.state_dim,
+            "count": self._count,
+            "name": self._shm.name,
+        }
+    
+    def __setstate__(self, state):
+        self.capacity = state["capacity"]
+        self.state_dim = state["state_dim"]
+        self._count = state["count"]
+        self._shm = SharedMemory(name=state["name"])
+        self._owner_pid = None
+        self._attach()
+    
+    def add(self, state: np.ndarray, action: int, reward: float, next_state: np.ndarray, done: bool):
+        """Schreibt einen Übergang in den nächsten freien Slot."""
+        with self._count.get_lock():
+            slot = self._count.value % self.capacity
+            self.states[slot] = state
+            self.next_states[slot] = next_state
+            self.actions[slot] = action
+            self.rewards[slot] = reward
+            self.dones[slot] = float(done)
+            self._count.value += 1
+    
+    @property
+    def total_added(self) -> int:
+        """Anzahl aller jemals geschriebenen Übergänge."""
+        return self._count.value
+    
+    def __len__(self) -> int:
+        return min(self._count.value, self.capacity)
+    
+    def sample(self, batch_size: int, rng: np.random.Generator) -> Tuple[np.ndarray, ...]:
+        """
+        Zieht einen zufälligen Minibatch (Kopien, unabhängig von weiteren Writes).
+        
+        Returns:
+            (states, next_states, actions, rewards, dones)
+        """
+        with self._count.get_lock():
+            idx = rng.integers(0, len(self), size=batch_size)
+            return (
+                self.states[idx], self.next_states[idx], self.actions[idx],
+                self.rewards[idx], self.dones[idx]
+            )
+    
+    def close(self):
+        """Löst die Sichten; der erzeugende Prozess gibt den Block frei."""
+        for name, _, _ in self._layout():
+            setattr(self, name, None)
+        self._shm.close()
+        if self._owner_pid == os.getpid():
+            self._shm.unlink()
+
+
+class SharedPolicyWeights:
+    """
+    Versionierte Policy-Gewichte in Shared Memory.
+    
+    Der Learner veröffentlicht die Gewichte der Linear-Layer alle paar
+    Updates; Actors übernehmen sie, sobald sich die Version ändert.
+    """
+    
+    def __init__(self, shapes: List[Tuple[int, ...]], ctx=None):
+        """
+        Args:
+            shapes: Formen der Gewichts-Arrays in Layer-Reihenfolge (W1, b1, W2, b2, ...)
+            ctx: multiprocessing-Kontext (default: Plattform-Standard)
+        """
+        ctx = ctx or multiprocessing.get_context()
+        self.shapes = [tuple(shape) for shape in shapes]
+        self._version = ctx.Value('q', 0)
+        self._shm = SharedMemory(create=True, size=self._size() * np.dtype(np.float32).itemsize)
+        self._owner_pid = os.getpid()
+        self._flat = np.ndarray(self._size(), dtype=np.float32, buffer=self._shm.buf)
+    
+    def _size(self) -> int:
+        return sum(int(np.prod(shape)) for shape in self.shapes)
+    
+    def __getstate__(self):
+        return {"shapes": self.shapes, "version": self._version, "name": self._shm.name}
+    
+    def __setstate__(self, state):
+        self.shapes = state["shapes"]
+        self._version = state["version"]
+        self._shm = SharedMemory(name=state["name"])
+        self._owner_pid = None
+        self._flat = np.ndarray(self._size(), dtype=np.float32, buffer=self._shm.buf)
+    
+    def publish(self, arrays: List[np.ndarray]):
+        """Schreibt neue Gewichte und erhöht die Version."""
+        with self._version.get_lock():
+            offset = 0
+            for array in arrays:
+                size = array.size
+                self._flat[offset:offset + size] = array.ravel()
+                offset += size
+            self._version.value += 1
+    
+    def fetch(self, known_version: int) -> Optional[Tuple[int, List[np.ndarray]]]:
+        """
+        Liefert (Version, Gewichte), falls neuer als known_version, sonst None.
+        """
+        with self._version.get_lock():
+            version = self._version.value
+            if version == known_version:
+                return None
+            arrays = []
+            offset = 0
+            for shape in self.shapes:
+                size = int(np.prod(shape))
+                arrays.append(self._flat[offset:offset + size].reshape(shape).copy())
+                offset += size
+        return version, arrays
+    
+    def close(self):
+        """Löst die Sicht; der erzeugende Prozess gibt den Block frei."""
+        self._flat = None
+        self._shm.close()
+        if self._owner_pid == os.getpid():
+            self._shm.unlink()
+
+
+class SharedEpisodeStats:
+    """
+    Prozessübergreifende Episoden-Statistik der Actors (Anzahl und
+    Reward-Summe abgeschlossener Episoden).
+    """
+    
+    def __init__(self, ctx=None):
+        """
+        Args:
+            ctx: multiprocessing-Kontext (default: Plattform-Standard)
+        """
+        ctx = ctx or multiprocessing.get_context()
+        self._episodes = ctx.Value('q', 0)
+        self._reward_sum = ctx.Value('d', 0.0)
+    
+    def record(self, episode_reward: float):
+        """Verbucht eine abgeschlossene Episode."""
+        with self._episodes.get_lock():
+            self._episodes.value += 1
+            self._reward_sum.value += episode_reward
+    
+    def snapshot(self) -> Tuple[int, float]:
+        """
+        Returns:
+            (Anzahl Episoden, durchschnittlicher Episoden-Reward)
+        """
+        with self._episodes.get_lock():
+            episodes = self._episodes.value
+            reward_sum = self._reward_sum.value
+        return episodes, reward_sum / episodes if episodes else 0.0
+
+
+def q_values_numpy(arrays: List[np.ndarray], state: np.ndarray) -> np.ndarray:
+    """
+    Forward-Pass des DQN-MLP (Linear/ReLU-Stapel) in NumPy.
+    
+    Actors brauchen so kein PyTorch; arrays sind (W1, b1, W2, b2, ...)
+    im Layout von torch.nn.Linear (W: out x in).
+    """
+    x = state
+    num_layers = len(arrays) // 2
+    for layer in range(num_layers):
+        weight, bias = arrays[2 * layer], arrays[2 * layer + 1]
+        x = x @ weight.T + bias
+        if layer < num_layers - 1:
+            x = np.maximum(x, 0.0)
+    return x
+
+
+def actor_worker(
+    orders: List[Order],
+    max_time_steps: int,
+    max_episode_steps: int,
+    buffer: SharedReplayBuffer,
+    weights: SharedPolicyWeights,
+    epsilon: float,
+    stop_event,
+    episode_stats: SharedEpisodeStats,
+    seed: Optional[int] = None
+):
+    """
+    Actor-Prozess: spielt Episoden mit der zuletzt veröffentlichten Policy
+    (ε-greedy) und schreibt alle Übergänge in den Shared Replay Buffer.
+    Abgeschlossene Episoden werden in episode_stats verbucht, eine durch
+    stop_event abgebrochene nicht.
+    """
+    from app.services.rl_agent import RLAgent
+    
+    env = TourEnvironment(list(orders), max_time_steps=max_time_steps, array_state=True)
+    num_actions = len(env.get_possible_actions())
+    rng = np.random.default_rng(seed)
+    version, arrays = weights.fetch(-1)
+    state_vec = np.empty(buffer.state_dim, dtype=np.float32)
+    next_vec = np.empty(buffer.state_dim, dtype=np.float32)
+    
+    try:
+        while not stop_event.is_set():
+            state = env.reset()
+            RLAgent._fill_state(state_vec, state)
+            episode_reward = 0.0
+            finished = True
+            for _ in range(max_episode_steps):
+                if rng.random() < epsilon:
+                    action = int(rng.integers(num_actions))
+                else:
+                    action = int(np.argmax(q_values_numpy(arrays, state_vec)))
+                
+                next_state, reward, terminated, truncated, info = env.step(action)
+                RLAgent._fill_state(next_vec, info.get("final_observation", next_state))
+                buffer.add(state_vec, action, reward, next_vec, terminated)
+                episode_reward += reward
+                state_vec, next_vec = next_vec, state_vec
+                
+                # Neue Gewichte übernehmen, sobald der Learner sie veröffentlicht
+                update = weights.fetch(version)
+                if update is not None:
+                    version, arrays = update
+                
+                if terminated or truncated:
+                    break
+                if stop_event.is_set():
+                    finished = False
+                    break
+            
+            if finished:
+                episode_stats.record(episode_reward)
+    finally:
+        buffer.close()
+        weights.close()
@@ -1,43 +1,175 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from functools import lru_cache
+import importlib.util
+import multiprocessing
+import time
 import numpy as np
+import orjson
 import random
+# PyTorch wird erst bei Bedarf importiert (Training/Modell laden), damit
+# Worker im Stub-Modus nicht die Import-Zeit und den Speicher bezahlen
+TORCH_AVAILABLE = importlib.util.find_spec("torch") is not None
+if not TORCH_AVAILABLE:
+    print("[RL Agent] PyTorch not available, using fallback mode")
+
+_torch = None
+_torch_num_threads: Optional[int] = None
+
 try:
-    import torch
-    import torch.nn as nn
-    import torch.optim as optim
-    TORCH_AVAILABLE = True
+    from numba import njit
+    NUMBA_AVAILABLE = True
 except ImportError:
-    TORCH_AVAILABLE = False
-    print("[RL Agent] PyTorch not available, using fallback mode")
+    NUMBA_AVAILABLE = False
+
+# Ab dieser Auftragsanzahl sortiert der Fallback über NumPy/Numba statt sorted()
+NUMERIC_SORT_MIN_ORDERS = 32
 
 from app.models.schemas import Order
 from app.services.road_network import road_network
+from app.services.environment import State, TourEnvironment, VecTourEnvironment, SubprocVecTourEnvironment
+from app.services.replay import SharedReplayBuffer, SharedPolicyWeights, SharedEpisodeStats, actor_worker
 from app.services.traffic_api import traffic_client
 from app.core.config import settings
 
+# Vektor-Umgebungen für RLAgent.train(num_envs > 1)
+_VEC_BACKENDS = {
+    "sync": VecTourEnvironment,
+    "subproc": SubprocVecTourEnvironment,
+}
+
 
-class DQN(nn.Module if TORCH_AVAILABLE else object):
+def _priority_order_kernel(priorities: np.ndarray, order_ids: np.ndarray) -> np.ndarray:
     """
-    Deep Q-Network für Route-Optimierung.
+    Indizes der Aufträge sortiert nach (Priorität, order_id).
+    
+    Zwei stabile Sortierungen (erst order_id, dann Priorität) ergeben die
+    Reihenfolge von sorted() nach (priority, order_id).
+    Mit Numba JIT-kompiliert, sonst reines NumPy.
+    """
+    idx = np.argsort(order_ids, kind='mergesort')
+    return idx[np.argsort(priorities[idx], kind='mergesort')]
+
+
+_priority_order = njit(cache=True)(_priority_order_kernel) if NUMBA_AVAILABLE else _priority_order_kernel
+
+
+@lru_cache(maxsize=256)
+def _sorted_positions(signature: Tuple[Tuple[int, int], ...]) -> Tuple[int, ...]:
     """
+    Positionen der Aufträge sortiert nach (Priorität, order_id).
     
-    def __init__(self, input_dim: int, output_dim: int):
-        if not TORCH_AVAILABLE:
-            return
-        super(DQN, self).__init__()
-        hidden_dim = settings.GRAPH_HIDDEN_DIM
-        self.net = nn.Sequential(
-            nn.Linear(input_dim, hidden_dim),
-            nn.ReLU(),
-            nn.Linear(hidden_dim, hidden_dim),
-            nn.ReLU(),
-            nn.Linear(hidden_dim, output_dim)
-        )
+    Gecacht pro Signatur, damit dieselbe Auftragsliste (Trainings-Episoden,
+    Retries) nicht jedes Mal neu sortiert wird.
     
-    def forward(self, x):
-        if not TORCH_AVAILABLE:
-            raise RuntimeError("PyTorch not available")
-        return self.net(x)
+    Args:
+        signature: (priority, order_id) pro Auftrag, in Eingabe-Reihenfolge
+    
+    Returns:
+        Positionen in sortierter Reihenfolge
+    """
+    n = len(signature)
+    if n >= NUMERIC_SORT_MIN_ORDERS:
+        priorities = np.fromiter((p for p, _ in signature), dtype=np.int64, count=n)
+        order_ids = np.fromiter((i for _, i in signature), dtype=np.int64, count=n)
+        return tuple(_priority_order(priorities, order_ids).tolist())
+    return tuple(sorted(range(n), key=signature.__getitem__))
+
+
+def _sort_orders(orders: List[Order]) -> List[Order]:
+    """Sortiert Aufträge nach Priorität, dann order_id (stabil, gecacht)."""
+    signature = tuple((o.priority, o.order_id) for o in orders)
+    return [orders[i] for i in _sorted_positions(signature)]
+
+
+def _sort_order_batches(order_batches: List[List[Order]]) -> List[List[Order]]:
+    """
+    Sortiert mehrere Auftragslisten auf einmal nach (Priorität, order_id).
+    
+    Ein stabiler lexsort über (Liste, Priorität, order_id) aller Aufträge
+    liefert dieselbe Reihenfolge wie _sort_orders pro Liste.
+    """
+    flat = [order for orders in order_batches for order in orders]
+    counts = [len(orders) for orders in order_batches]
+    batch_ids = np.repeat(np.arange(len(order_batches)), counts)
+    priorities = np.fromiter((o.priority for o in flat), dtype=np.int64, count=len(flat))
+    order_ids = np.fromiter((o.order_id for o in flat), dtype=np.int64, count=len(flat))
+    ranking = np.lexsort((order_ids, priorities, batch_ids)).tolist()
+    
+    sorted_batches = []
+    offset = 0
+    for count in counts:
+        sorted_batches.append([flat[i] for i in ranking[offset:offset + count]])
+        offset += count
+    return sorted_batches
+
+
+def _unique_stops(stops: List[str]) -> List[str]:
+    """
+    Entfernt doppelte Stopps unter Beibehaltung der Reihenfolge.
+    
+    dict.fromkeys dedupliziert komplett in C (ein Hash pro Element) und
+    ist für Routenlängen dieses Services schneller als numpy/pandas-unique,
+    die erst ein Object-Array aufbauen müssten.
+    """
+    return list(dict.fromkeys(stops))
+
+
+def _get_torch():
+    """Importiert PyTorch beim ersten Aufruf und wendet configure_torch() an."""
+    global _torch
+    if _torch is None:
+        import torch
+        if _torch_num_threads is not None:
+            torch.set_num_threads(_torch_num_threads)
+        _torch = torch
+    return _torch
+
+
+def configure_torch(num_threads: int):
+    """
+    Setzt die Thread-Anzahl für PyTorch, ohne PyTorch dafür zu importieren.
+    
+    Ist PyTorch noch nicht geladen, wird die Einstellung beim ersten
+    Import angewendet.
+    """
+    global _torch_num_threads
+    _torch_num_threads = num_threads
+    if _torch is not None:
+        _torch.set_num_threads(num_threads)
+
+
+@lru_cache(maxsize=1)
+def _dqn_class():
+    """Definiert die DQN-Klasse beim ersten Bedarf (nn.Module braucht PyTorch)."""
+    nn = _get_torch().nn
+    
+    class DQN(nn.Module):
+        """
+        Deep Q-Network für Route-Optimierung.
+        """
+        
+        def __init__(self, input_dim: int, output_dim: int):
+            super(DQN, self).__init__()
+            hidden_dim = settings.GRAPH_HIDDEN_DIM
+            self.net = nn.Sequential(
+                nn.Linear(input_dim, hidden_dim),
+                nn.ReLU(),
+                nn.Linear(hidden_dim, hidden_dim),
+                nn.ReLU(),
+                nn.Linear(hidden_dim, output_dim)
+            )
+        
+        def forward(self, x):
+            return self.net(x)
+    
+    return DQN
+
+
+def build_dqn(input_dim: int, output_dim: int):
+    """Erzeugt ein Deep Q-Network für Route-Optimierung."""
+    if not TORCH_AVAILABLE:
+        raise RuntimeError("PyTorch not available")
+    return _dqn_class()(input_dim, output_dim)
 
 
 class RLAgent:
@@ -54,6 +186,7 @@ class RLAgent:
         """Initialisiere den RL-Agent"""
         self.trained = False
         self.model = None
+        self.infer_model = None
         self.training_history: List[Dict[str, Any]] = []
         self.use_dqn = TORCH_AVAILABLE
         
@@ -69,9 +202,20 @@ class RLAgent:
         self.input_dim = None
         self.output_dim = None
         self.optimizer = None
-        self.loss_fn = nn.MSELoss() if TORCH_AVAILABLE else None
+        # Kompilierte Sicht auf self.model nur für das Training (state_dict bleibt sauber)
+        self._train_model = None
+        self.loss_fn = None
+        # Replay Buffer als vorallokierte NumPy-Ringpuffer (siehe _init_replay)
+        self._replay_states = None
 
-    def train(self, environment=None, episodes: int = None, learning_rate: float = None) -> Dict[str, Any]:
+    def train(
+        self,
+        environment=None,
+        episodes: int = None,
+        learning_rate: float = None,
+        num_envs: int = 1,
+        vec_backend: str = "sync"
+    ) -> Dict[str, Any]:
         """
         Trainiere den RL-Agent.
         
@@ -79,9 +223,13 @@ class RLAgent:
         Sonst: Stub-Training
         
         Args:
-            environment: TourEnvironment-Instanz (optional)
+            environment: TourEnvironment- oder Vektor-Umgebungs-Instanz (optional)
             episodes: Anzahl Trainings-Episoden
             learning_rate: Lernrate
+            num_envs: Anzahl paralleler Umgebungen; bei > 1 wird eine
+                TourEnvironment in eine Vektor-Umgebung gekapselt
+            vec_backend: "sync" (VecTourEnvironment, ein Prozess) oder
+                "subproc" (SubprocVecTourEnvironment, ein Prozess pro Umgebung)
         
         Returns:
             Dict mit Training-Statistiken
@@ -92,6 +240,24 @@ class RLAgent:
         if not self.use_dqn or environment is None:
             return self._train_stub(episodes, learning_rate)
         
+        if vec_backend not in _VEC_BACKENDS:
+            raise ValueError(f"Unknown vec_backend: {vec_backend}")
+        
+        if isinstance(environment, TourEnvironment) and num_envs > 1:
+            vec_env = _VEC_BACKENDS[vec_backend](
+                environment.orders,
+                num_envs=num_envs,
+                # Episodenlänge wie im Einzel-Training auf GRAPH_MAX_STEPS begrenzen
+                max_time_steps=min(environment.max_time_steps, settings.GRAPH_MAX_STEPS)
+            )
+            try:
+                return self._train_dqn_vec(vec_env, episodes, learning_rate)
+            finally:
+                if hasattr(vec_env, "close"):
+                    vec_env.close()
+        if isinstance(environment, (VecTourEnvironment, SubprocVecTourEnvironment)):
+            return self._train_dqn_vec(environment, episodes, learning_rate)
+        
         return self._train_dqn(environment, episodes, learning_rate)
     
     def _train_stub(self, episodes: int, learning_rate: float) -> Dict[str, Any]:
@@ -116,19 +282,14 @@ class RLAgent:
         """
         if not TORCH_AVAILABLE:
             return self._train_stub(episodes, learning_rate)
+        torch = _get_torch()
         
         # Initialisiere Modell basierend auf Environment-State
-        state = environment.reset()
-        state_array = self._state_to_array(state)
-        
-        if self.input_dim is None:
-            self.input_dim = len(state_array)
-            self.output_dim = len(environment.get_possible_actions())
-            self.model = DQN(self.input_dim, self.output_dim)
-            self.optimizer = optim.Adam(self.model.parameters(), lr=learning_rate)
+        self._prepare_training(self._state_to_array(environment.reset()), environment, learning_rate)
         
         gamma = settings.RL_GAMMA
         epsilon = settings.RL_EPSILON
+        batch_size = settings.RL_BATCH_SIZE
         
         total_rewards = []
         
@@ -137,47 +298,44 @@ class RLAgent:
             episode_reward = 0.0
             
             for step in range(settings.GRAPH_MAX_STEPS):
-                state_tensor = torch.tensor(
-                    self._state_to_array(state), 
-                    dtype=torch.float32
-                )
+                # States werden direkt in den nächsten Replay-Slot geschrieben
+                slot = self._replay_pos
+                state_row = self._fill_state(self._replay_states[slot], state)
                 
                 # ε-greedy Policy
                 if random.random() < epsilon:
                     action = random.randint(0, self.output_dim - 1)
                 else:
                     with torch.no_grad():
-                        action = self.model(state_tensor).argmax().item()
+                        # from_numpy teilt den Speicher mit dem Replay-Slot (keine Kopie)
+                        # Als (1, input_dim)-Batch: gleiche Form wie beim Compile-Warmup
+                        action = self._train_model(torch.from_numpy(state_row)[None]).argmax().item()
                 
                 # Führe Action aus (mit Live-Traffic)
-                next_state, reward, done = environment.step(action)
+                next_state, reward, terminated, truncated, info = environment.step(action)
                 episode_reward += reward
                 
-                # Q-Learning Update
-                q_values = self.model(state_tensor)
-                next_state_tensor = torch.tensor(
-                    self._state_to_array(next_state),
-                    dtype=torch.float32
-                )
-                next_q_values = self.model(next_state_tensor)
-                
-                target = q_values.clone()
-                target[action] = reward + gamma * next_q_values.max().item()
-                
-                loss = self.loss_fn(q_values, target.detach())
+                # Nach Autoreset ist next_state schon der neue Initial-State
+                self._fill_state(self._replay_next_states[slot], info.get("final_observation", next_state))
+                self._replay_actions[slot] = action
+                self._replay_rewards[slot] = reward
+                self._replay_dones[slot] = float(terminated)
+                self._replay_pos = (slot + 1) % len(self._replay_states)
+                self._replay_len = min(self._replay_len + 1, len(self._replay_states))
                 
-                self.optimizer.zero_grad()
-                loss.backward()
-                self.optimizer.step()
+                # Q-Learning Update auf einem Minibatch aus dem Replay Buffer
+                if self._replay_len >= batch_size:
+                    self._replay_update(gamma, batch_size)
                 
                 state = next_state
                 
-                if done:
+                if terminated or truncated:
                     break
             
             total_rewards.append(episode_reward)
         
         self.trained = True
+        self.optimize_for_inference()
         
         training_stats = {
             "episodes": episodes,
@@ -193,19 +351,344 @@ class RLAgent:
         self.training_history.append(training_stats)
         return training_stats
     
+    def _prepare_training(self, state_array: np.ndarray, environment, learning_rate: float):
+        """
+        Legt Modell, Optimizer, Trainings-Sicht und Replay Buffer beim
+        ersten Training an (Dimensionen aus dem Environment-State).
+        """
+        torch = _get_torch()
+        if self.input_dim is None:
+            self.input_dim = len(state_array)
+            self.output_dim = len(environment.get_possible_actions())
+            self.model = build_dqn(self.input_dim, self.output_dim)
+            self.optimizer = torch.optim.Adam(self.model.parameters(), lr=learning_rate)
+            self.loss_fn = torch.nn.MSELoss()
+        
+        if self._train_model is None:
+            self._train_model = self._compile_for_training(self.model)
+        
+        if self._replay_states is None:
+            self._init_replay(self.input_dim, settings.RL_REPLAY_SIZE)
+    
+    def _train_dqn_vec(self, vec_env, episodes: int, learning_rate: float) -> Dict[str, Any]:
+        """
+        DQN Training über mehrere Umgebungen gleichzeitig.
+        
+        Pro Schritt ein gebatchter Forward-Pass für alle Umgebungen und ein
+        step() der Vektor-Umgebung; beendete Umgebungen starten per Autoreset
+        neu. Gebootstrapped wird nur, wenn die Episode nicht terminiert ist.
+        Trainiert, bis insgesamt `episodes` Episoden abgeschlossen sind.
+        """
+        if not TORCH_AVAILABLE:
+            return self._train_stub(episodes, learning_rate)
+        torch = _get_torch()
+        
+        states = vec_env.reset()
+        self._prepare_training(self._state_to_array(states[0]), vec_env, learning_rate)
+        
+        gamma = settings.RL_GAMMA
+        epsilon = settings.RL_EPSILON
+        batch_size = settings.RL_BATCH_SIZE
+        num_envs = vec_env.num_envs
+        capacity = len(self._replay_states)
+        
+        state_batch = np.empty((num_envs, self.input_dim), dtype=np.float32)
+        episode_rewards = np.zeros(num_envs, dtype=np.float64)
+        total_rewards: List[float] = []
+        total_steps = 0
+        
+        while len(total_rewards) < episodes:
+            for i, state in enumerate(states):
+                self._fill_state(state_batch[i], state)
+            
+            # ε-greedy Policy: ein Forward-Pass für alle Umgebungen
+            actions = self._greedy_actions(state_batch, self._train_model)
+            explore = np.random.random(num_envs) < epsilon
+            actions = np.where(explore, np.random.randint(0, self.output_dim, size=num_envs), actions)
+            
+            states, rewards, dones, terminated, final_states = vec_env.step(actions.tolist())
+            episode_rewards += rewards
+            total_steps += num_envs
+            
+            # Alle Übergänge dieses Schritts in den Ring-Puffer schreiben
+            slots = (self._replay_pos + np.arange(num_envs)) % capacity
+            self._replay_states[slots] = state_batch
+            for slot, final_state in zip(slots, final_states):
+                self._fill_state(self._replay_next_states[slot], final_state)
+            self._replay_actions[slots] = actions
+            self._replay_rewards[slots] = rewards
+            self._replay_dones[slots] = terminated
+            self._replay_pos = int((slots[-1] + 1) % capacity)
+            self._replay_len = min(self._replay_len + num_envs, capacity)
+            
+            if self._replay_len >= batch_size:
+                self._replay_update(gamma, batch_size)
+            
+            for i in np.flatnonzero(dones):
+                total_rewards.append(float(episode_rewards[i]))
+                episode_rewards[i] = 0.0
+        
+        self.trained = True
+        self.optimize_for_inference()
+        
+        training_stats = {
+            "episodes": episodes,
+            "learning_rate": learning_rate,
+            "status": "trained_dqn",
+            "avg_reward": float(np.mean(total_rewards[:episodes])),
+            "total_steps": total_steps,
+            "mode": "dqn_vec",
+            "num_envs": num_envs,
+            "epsilon": epsilon,
+            "gamma": gamma
+        }
+        
+        self.training_history.append(training_stats)
+        return training_stats
+    
+    def train_distributed(
+        self,
+        environment: TourEnvironment,
+        updates: int = 1000,
+        learning_rate: float = None,
+        num_actors: int = None
+    ) -> Dict[str, Any]:
+        """
+        Actor/Learner-Training (Ape-X-Muster).
+        
+        num_actors Prozesse spielen Episoden mit einer Kopie der Policy
+        (NumPy-Forward, kein PyTorch im Actor) und schreiben in einen Replay
+        Buffer in Shared Memory. Dieser Prozess zieht daraus Minibatches,
+        führt die Gradienten-Schritte aus und veröffentlicht die Gewichte
+        alle settings.RL_SYNC_EVERY Updates.
+        
+        Args:
+            environment: TourEnvironment (Vorlage für die Actor-Umgebungen)
+            updates: Anzahl Learner-Updates
+            learning_rate: Lernrate
+            num_actors: Anzahl Actor-Prozesse (default: settings.RL_NUM_ACTORS)
+        
+        Returns:
+            Dict mit Training-Statistiken
+        """
+        learning_rate = learning_rate or settings.RL_LEARNING_RATE
+        num_actors = num_actors or settings.RL_NUM_ACTORS
+        if not self.use_dqn or not TORCH_AVAILABLE:
+            return self._train_stub(updates, learning_rate)
+        
+        self._prepare_training(self._state_to_array(environment.reset()), environment, learning_rate)
+        
+        gamma = settings.RL_GAMMA
+        batch_size = settings.RL_BATCH_SIZE
+        ctx = multiprocessing.get_context()
+        buffer = SharedReplayBuffer(settings.RL_REPLAY_SIZE, self.input_dim, ctx=ctx)
+        policy = self._policy_arrays()
+        weights = SharedPolicyWeights([array.shape for array in policy], ctx=ctx)
+        weights.publish(policy)
+        stop_event = ctx.Event()
+        episode_stats = SharedEpisodeStats(ctx=ctx)
+        
+        actors = [
+            ctx.Process(
+                target=actor_worker,
+                args=(environment.orders, environment.max_time_steps, settings.GRAPH_MAX_STEPS,
+                      buffer, weights, settings.RL_EPSILON, stop_event, episode_stats, seed),
+                daemon=True
+            )
+            for seed in range(num_actors)
+        ]
+        for actor in actors:
+            actor.start()
+        
+        rng = np.random.default_rng()
+        try:
+            while len(buffer) < batch_size:
+                if not any(actor.is_alive() for actor in actors):
+                    raise RuntimeError("All actor processes exited before filling the replay buffer")
+                time.sleep(0.001)
+            
+            for update in range(1, updates + 1):
+                self._learn_from_batch(*buffer.sample(batch_size, rng), gamma)
+                if update % settings.RL_SYNC_EVERY == 0:
+                    weights.publish(self._policy_arrays())
+            transitions = buffer.total_added
+        finally:
+            stop_event.set()
+            for actor in actors:
+                actor.join(timeout=5)
+            buffer.close()
+            weights.close()
+        
+        self.trained = True
+        self.optimize_for_inference()
+        
+        # Von den Actors abgeschlossene Episoden (bis zum Stop-Signal)
+        episodes, avg_reward = episode_stats.snapshot()
+        training_stats = {
+            "episodes": episodes,
+            "learning_rate": learning_rate,
+            "status": "trained_dqn",
+            "avg_reward": avg_reward,
+            "total_steps": transitions,
+            "mode": "dqn_apex",
+            "updates": updates,
+            "num_actors": num_actors,
+            "gamma": gamma
+        }
+        
+        self.training_history.append(training_stats)
+        return training_stats
+    
+    def _policy_arrays(self) -> List[np.ndarray]:
+        """Gewichte der Linear-Layer als float32-Arrays (W1, b1, W2, b2, ...)."""
+        torch = _get_torch()
+        arrays = []
+        with torch.no_grad():
+            for layer in self.model.net:
+                if isinstance(layer, torch.nn.Linear):
+                    arrays.append(layer.weight.detach().cpu().numpy().astype(np.float32))
+                    arrays.append(layer.bias.detach().cpu().numpy().astype(np.float32))
+        return arrays
+    
+    def _compile_for_training(self, model):
+        """
+        Kompiliert das Q-Netz mit torch.compile (PyTorch 2.x, settings.RL_TORCH_COMPILE).
+        
+        Bei einem so kleinen MLP dominiert der Dispatcher-Overhead; Inductor
+        fusioniert Linear+ReLU. Inductor übersetzt auf der CPU beim ersten
+        Aufruf generierten C++-Code: ein Warmup mit den Trainings-Formen
+        (Einzel-State, Minibatch mit Backward) stößt das hier an. Scheitert
+        das (z.B. kein C++-Compiler im Image) oder ist torch.compile nicht
+        vorhanden, wird das Modell eager genutzt. Das kompilierte Modul
+        teilt die Parameter mit dem Original.
+        """
+        torch = _get_torch()
+        if not settings.RL_TORCH_COMPILE or not hasattr(torch, "compile"):
+            return model
+        
+        compiled = torch.compile(model)
+        try:
+            with torch.no_grad():
+                compiled(torch.zeros(1, self.input_dim, dtype=torch.float32))
+            compiled(torch.zeros(settings.RL_BATCH_SIZE, self.input_dim, dtype=torch.float32)).sum().backward()
+        except Exception as e:
+            print(f"[RL Agent] torch.compile unavailable, training eagerly: {e}")
+            return model
+        finally:
+            model.zero_grad(set_to_none=True)
+        return compiled
+    
+    def _init_replay(self, state_dim: int, capacity: int):
+        """
+        Allokiert den Replay Buffer einmalig als spaltenweise NumPy-Arrays.
+        
+        Pro Schritt entstehen so keine neuen Arrays/Tensoren; Minibatches
+        sind ein Fancy-Indexing pro Spalte.
+        """
+        self._replay_states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self._replay_next_states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self._replay_actions = np.zeros(capacity, dtype=np.int64)
+        self._replay_rewards = np.zeros(capacity, dtype=np.float32)
+        self._replay_dones = np.zeros(capacity, dtype=np.float32)
+        self._replay_pos = 0
+        self._replay_len = 0
+    
+    def _replay_update(self, gamma: float, batch_size: int):
+        """
+        Ein Q-Learning-Schritt auf einem zufälligen Minibatch.
+        
+        Ein gebatchter Forward/Backward statt vieler Single-Sample-Updates.
+        """
+        idx = np.random.randint(0, self._replay_len, size=batch_size)
+        self._learn_from_batch(
+            self._replay_states[idx], self._replay_next_states[idx], self._replay_actions[idx],
+            self._replay_rewards[idx], self._replay_dones[idx], gamma
+        )
+    
+    def _learn_from_batch(
+        self,
+        states: np.ndarray,
+        next_states: np.ndarray,
+        actions: np.ndarray,
+        rewards: np.ndarray,
+        dones: np.ndarray,
+        gamma: float
+    ):
+        """Gradienten-Schritt auf einem Minibatch aus NumPy-Spalten."""
+        torch = _get_torch()
+        states = torch.from_numpy(states)
+        next_states = torch.from_numpy(next_states)
+        actions = torch.from_numpy(actions)
+        rewards = torch.from_numpy(rewards)
+        dones = torch.from_numpy(dones)
+        
+        q_values = self._train_model(states).gather(1, actions.unsqueeze(1)).squeeze(1)
+        with torch.no_grad():
+            target = rewards + gamma * self._train_model(next_states).max(1).values * (1 - dones)
+        
+        loss = self.loss_fn(q_values, target)
+        
+        self.optimizer.zero_grad()
+        loss.backward()
+        self.optimizer.step()
+    
+    def optimize_for_inference(self):
+        """
+        Kompiliert das trainierte Q-Netz mit TorchScript für die Inferenz.
+        
+        Mit settings.RL_QUANTIZE werden die Linear-Layer vorher dynamisch
+        nach int8 quantisiert (für argmax über Q-Werte reicht die Präzision);
+        ohne quantisierte Engine (z.B. manche ARM-Builds) bleibt das Netz
+        FP32. Das Ergebnis nutzt act_batch.
+        Ein Warmup-Forward-Pass sorgt dafür, dass der erste echte Request
+        keine Kompilierungs-Latenz trägt.
+        """
+        if not TORCH_AVAILABLE or self.model is None:
+            return
+        torch = _get_torch()
+        
+        self.model.eval()
+        net = self.model.net
+        if settings.RL_QUANTIZE and torch.backends.quantized.engine != "none":
+            # Kopie: self.model bleibt FP32 für Training und save_model()
+            try:
+                net = torch.ao.quantization.quantize_dynamic(net, {torch.nn.Linear}, dtype=torch.qint8)
+            except RuntimeError as e:
+                # Kein int8-Kernel für diese CPU/Engine: FP32 inferieren
+                print(f"[RL Agent] int8 quantization unavailable, serving FP32: {e}")
+                net = self.model.net
+        self.infer_model = torch.jit.script(net)
+        with torch.no_grad():
+            self.infer_model(torch.zeros(1, self.input_dim, dtype=torch.float32))
+        self.model.train()
+    
     def _state_to_array(self, state: Dict[str, Any]) -> np.ndarray:
         """
         Konvertiert Environment-State in NumPy Array.
         """
+        return self._fill_state(np.empty(4, dtype=np.float32), state)
+
+    @staticmethod
+    def _fill_state(buf: np.ndarray, state: State) -> np.ndarray:
+        """
+        Schreibt die State-Repräsentation in einen bestehenden Puffer.
+        
+        Returns:
+            Den befüllten Puffer
+        """
+        if isinstance(state, np.ndarray):
+            # array_state-Umgebung: Felder liegen schon in Puffer-Reihenfolge
+            buf[:] = state
+            return buf
+        
         # Einfache State-Repräsentation
-        return np.array([
-            state.get("time", 0),
-            state.get("orders_left", 0),
-            state.get("assigned_orders_count", 0),
-            state.get("total_reward", 0.0)
-        ])
+        buf[0] = state.get("time", 0)
+        buf[1] = state.get("orders_left", 0)
+        buf[2] = state.get("assigned_orders_count", 0)
+        buf[3] = state.get("total_reward", 0.0)
+        return buf
 
-    def predict(self, orders: List[Order]) -> List[str]:
+    def predict(self, orders: List[Order], delay_factor: Optional[float] = None) -> List[str]:
         """
         Vorhersage einer Route basierend auf Aufträgen.
         
@@ -214,6 +697,8 @@ class RLAgent:
         
         Args:
             orders: Liste von Order-Objekten
+            delay_factor: Bereits abgerufener Live-Traffic-Delay (optional,
+                sonst wird die Autobahn API synchron abgefragt)
         
         Returns:
             Liste von Stopps (Locations) in optimierter Reihenfolge
@@ -221,33 +706,79 @@ class RLAgent:
         if not orders:
             return []
         
-        # Sammle alle Locations
-        locations = set()
-        for order in orders:
-            locations.add(order.start_location)
-            locations.add(order.end_location)
-        
         # Aktualisiere Straßennetz mit Traffic-Daten
-        self._update_network_with_traffic(locations)
+        self._update_network_with_traffic(delay_factor)
         
         if self.use_dqn and self.trained and self.model:
             return self._predict_with_dqn(orders)
         else:
             return self._predict_naive(orders)
     
-    def _update_network_with_traffic(self, locations: set):
+    def predict_batch(
+        self,
+        order_batches: List[List[Order]],
+        delay_factor: Optional[float] = None
+    ) -> List[List[str]]:
+        """
+        Vorhersage mehrerer Routen in einem Aufruf.
+        
+        Das Straßennetz wird nur einmal mit Traffic-Daten aktualisiert; alle
+        Auftragslisten werden mit einem gemeinsamen lexsort sortiert statt
+        pro Liste einzeln (gleiche Reihenfolge wie predict()).
+        
+        Args:
+            order_batches: Eine Auftragsliste pro Route
+            delay_factor: Bereits abgerufener Live-Traffic-Delay (optional)
+        
+        Returns:
+            Eine Stopp-Liste pro Auftragsliste (gleiche Reihenfolge)
+        """
+        if not any(order_batches):
+            return [[] for _ in order_batches]
+        
+        self._update_network_with_traffic(delay_factor)
+        
+        if self.use_dqn and self.trained and self.model:
+            return [self._route_through_network(orders) for orders in _sort_order_batches(order_batches)]
+        return self._predict_naive_batch(order_batches)
+    
+    def act_batch(self, states: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        Greedy-Actions für mehrere Environment-States mit einem Forward-Pass.
+        
+        Args:
+            states: Environment-States (z.B. aus VecTourEnvironment)
+        
+        Returns:
+            Action-Index pro State (ohne trainiertes Modell: 0)
+        """
+        if not TORCH_AVAILABLE or self.model is None:
+            return np.zeros(len(states), dtype=np.int64)
+        
+        state_batch = np.empty((len(states), self.input_dim), dtype=np.float32)
+        for i, state in enumerate(states):
+            self._fill_state(state_batch[i], state)
+        model = self.infer_model if self.infer_model is not None else self.model
+        return self._greedy_actions(state_batch, model)
+    
+    @staticmethod
+    def _greedy_actions(state_batch: np.ndarray, model) -> np.ndarray:
+        """argmax über die Q-Werte eines gestapelten State-Batches."""
+        torch = _get_torch()
+        with torch.no_grad():
+            q_values = model(torch.from_numpy(state_batch))
+        return torch.argmax(q_values, dim=-1).numpy()
+    
+    def _update_network_with_traffic(self, delay_factor: Optional[float] = None):
         """
         Aktualisiere Straßennetzwerk mit aktuellen Verkehrsdaten.
         """
         # Hole Live-Traffic-Delay
-        delay_factor = traffic_client.get_live_traffic_delay()
+        if delay_factor is None:
+            delay_factor = traffic_client.get_live_traffic_delay()
         
-        # Update alle relevanten Kanten
-        locations_list = list(locations)
-        for i, loc1 in enumerate(locations_list):
-            for loc2 in locations_list[i+1:]:
-                if road_network.has_location(loc1) and road_network.has_location(loc2):
-                    road_network.update_traffic(loc1, loc2, delay_factor)
+        # Der Delay ist global: ein Durchlauf über alle Kanten statt O(N²) Ortspaare
+        road_network.update_traffic_bulk(delay_factor)
     
     def _predict_with_dqn(self, orders: List[Order]) -> List[str]:
         """
@@ -257,7 +788,18 @@ class RLAgent:
             return self._predict_naive(orders)
         
         # Sortiere zunächst nach Priorität
-        sorted_orders = sorted(orders, key=lambda o: (o.priority, o.order_id))
+        return self._route_through_network(_sort_orders(orders))
+    
+    def _route_through_network(self, sorted_orders: List[Order]) -> List[str]:
+        """
+        Verbindet die Aufträge in gegebener Reihenfolge über kürzeste Pfade.
+        """
+        # Füge Standorte vorab zum Netzwerk hinzu, damit sich die Netzwerk-Version
+        # während der Routenbildung nicht ändert und die Pfade pro Startort
+        # (ein Dijkstra je Ort) für alle Aufträge gecacht bleiben
+        for order in sorted_orders:
+            road_network.add_location(order.start_location)
+            road_network.add_location(order.end_location)
         
         # Baue Route mit kürzesten Pfaden
         route = []
@@ -267,12 +809,6 @@ class RLAgent:
             start = order.start_location
             end = order.end_location
             
-            # Füge Standorte zum Netzwerk hinzu falls nötig
-            if not road_network.has_location(start):
-                road_network.add_location(start)
-            if not road_network.has_location(end):
-                road_network.add_location(end)
-            
             if current_location is None:
                 # Erste Station
                 route.append(start)
@@ -295,15 +831,7 @@ class RLAgent:
                     route.append(end)
                 current_location = end
         
-        # Entferne Duplikate unter Beibehaltung der Reihenfolge
-        seen = set()
-        unique_route = []
-        for stop in route:
-            if stop not in seen:
-                unique_route.append(stop)
-                seen.add(stop)
-        
-        return unique_route
+        return _unique_stops(route)
     
     def _predict_naive(self, orders: List[Order]) -> List[str]:
         """
@@ -315,7 +843,7 @@ class RLAgent:
         3. Entferne Duplikate (preserving order)
         """
         # Sortiere nach Priorität (höher = später) dann nach order_id
-        sorted_orders = sorted(orders, key=lambda o: (o.priority, o.order_id))
+        sorted_orders = _sort_orders(orders)
         
         # Sammle alle Stopps
         stops = []
@@ -326,15 +854,21 @@ class RLAgent:
         if sorted_orders:
             stops.append(sorted_orders[-1].end_location)
         
-        # Entferne Duplikate unter Beibehaltung der Reihenfolge
-        seen = set()
-        unique_stops = []
-        for stop in stops:
-            if stop not in seen:
-                unique_stops.append(stop)
-                seen.add(stop)
+        return _unique_stops(stops)
+    
+    def _predict_naive_batch(self, order_batches: List[List[Order]]) -> List[List[str]]:
+        """
+        Naive Sortierung für mehrere Auftragslisten auf einmal.
         
-        return unique_stops
+        Liefert dieselbe Reihenfolge wie _predict_naive pro Liste.
+        """
+        routes = []
+        for sorted_orders in _sort_order_batches(order_batches):
+            stops = [order.start_location for order in sorted_orders]
+            if sorted_orders:
+                stops.append(sorted_orders[-1].end_location)
+            routes.append(_unique_stops(stops))
+        return routes
 
     def get_training_history(self) -> List[Dict[str, Any]]:
         """
@@ -342,12 +876,26 @@ class RLAgent:
         """
         return self.training_history
     
+    def dump_history(self, path: str = "training_history.json"):
+        """
+        Speichert die Trainings-Historie als JSON (orjson, NumPy-Werte nativ).
+        """
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(self.training_history, option=orjson.OPT_SERIALIZE_NUMPY))
+    
+    def load_history(self, path: str = "training_history.json"):
+        """
+        Lädt eine mit dump_history gespeicherte Trainings-Historie.
+        """
+        with open(path, 'rb') as f:
+            self.training_history = orjson.loads(f.read())
+    
     def save_model(self, path: str = "dqn_traffic_model.pth"):
         """
         Speichert das trainierte DQN-Modell.
         """
         if self.model and TORCH_AVAILABLE:
-            torch.save(self.model.state_dict(), path)
+            _get_torch().save(self.model.state_dict(), path)
             print(f"[RL Agent] Model saved to {path}")
         else:
             print("[RL Agent] No model to save or PyTorch not available")
@@ -362,8 +910,9 @@ class RLAgent:
         
         try:
             if self.model:
-                self.model.load_state_dict(torch.load(path))
+                self.model.load_state_dict(_get_torch().load(path))
                 self.trained = True
+                self.optimize_for_inference()
                 print(f"[RL Agent] Model loaded from {path}")
             else:
                 print("[RL Agent] Model not initialized, cannot load weights")
@@ -1,17 +1,171 @@
 """
 Graph-basiertes Routing-Netzwerk für RL-Agent
 """
-import networkx as nx
-from typing import Dict, List, Tuple, Optional
+import heapq
+import math
+import threading
+import numpy as np
+from typing import Dict, Iterable, List, Tuple, Optional
+
+try:
+    from scipy.sparse import csr_matrix
+    from scipy.sparse.csgraph import dijkstra
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+def _dijkstra_csr_kernel(indptr, indices, data, source, target):
+    """
+    Punkt-zu-Punkt-Dijkstra über CSR-Arrays mit Array-Binärheap.
+    
+    Reiner Numerik-Code ohne Python-Objekte, damit Numba ihn kompilieren
+    kann; ohne Numba läuft dieselbe Funktion als normales Python.
+    
+    Args:
+        indptr: Zeilenzeiger (n + 1)
+        indices: Nachbar-Index pro Slot
+        data: Kantengewicht pro Slot
+        source: Start-Index
+        target: Ziel-Index
+    
+    Returns:
+        (Distanz zum Ziel oder inf, Vorgänger-Array)
+    """
+    n = indptr.shape[0] - 1
+    dist = np.full(n, np.inf)
+    pred = np.full(n, -1, dtype=np.int64)
+    # Lazy Deletion: jede Relaxation legt höchstens einen Eintrag ab
+    capacity = indices.shape[0] + 1
+    heap_key = np.empty(capacity, dtype=np.float64)
+    heap_val = np.empty(capacity, dtype=np.int64)
+    
+    dist[source] = 0.0
+    heap_key[0] = 0.0
+    heap_val[0] = source
+    heap_size = 1
+    
+    while heap_size > 0:
+        d = heap_key[0]
+        u = heap_val[0]
+        # Letztes Element an die Wurzel, dann sift-down
+        heap_size -= 1
+        key = heap_key[heap_size]
+        val = heap_val[heap_size]
+        i = 0
+        while True:
+            child = 2 * i + 1
+            if child >= heap_size:
+                break
+            if child + 1 < heap_size and heap_key[child + 1] < heap_key[child]:
+                child += 1
+            if heap_key[child] >= key:
+                break
+            heap_key[i] = heap_key[child]
+            heap_val[i] = heap_val[child]
+            i = child
+        heap_key[i] = key
+        heap_val[i] = val
+        
+        if u == target:
+            return d, pred
+        if d > dist[u]:
+            continue
+        
+        for slot in range(indptr[u], indptr[u + 1]):
+            v = indices[slot]
+            nd = d + data[slot]
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                # sift-up
+                i = heap_size
+                heap_size += 1
+                while i > 0:
+                    parent = (i - 1) // 2
+                    if heap_key[parent] <= nd:
+                        break
+                    heap_key[i] = heap_key[parent]
+                    heap_val[i] = heap_val[parent]
+                    i = parent
+                heap_key[i] = nd
+                heap_val[i] = v
+    
+    return np.inf, pred
+
+
+_dijkstra_csr = njit(cache=True)(_dijkstra_csr_kernel) if NUMBA_AVAILABLE else _dijkstra_csr_kernel
+
+# Obergrenze für gecachte (Start, Ziel)-Pfade je Gewichts-Version (Fallback ohne SciPy)
+_PAIR_CACHE_SIZE = 8192
 
 
 class RoadNetwork:
     """
-    Straßennetzwerk-Repräsentation mit NetworkX.
+    Straßennetzwerk-Repräsentation.
+    
+    Kantengewichte liegen als parallele NumPy-Arrays (Structure of Arrays,
+    indiziert über die Kanten-ID) vor; Traffic-Updates sind damit
+    vektorisierte Operationen über alle Kanten. Die Topologie steht in einem
+    schlichten Dict-of-Dicts (Ort -> {Nachbar: Kanten-ID}), ohne NetworkX.
+    
+    Thread-sicher: Die Instanz wird von mehreren Threads genutzt
+    (asyncio.to_thread in den Endpoints und im RouteBatcher). Ein
+    netzwerkweiter RLock umschließt alle Änderungen sowie alle Lesezugriffe,
+    die Versionen, Caches oder die CSR-Matrix verwenden; eine Abfrage sieht
+    so immer Knoten-Indizes, Gewichte und Dijkstra-Ergebnisse desselben Stands.
     """
     
     def __init__(self):
-        self.graph = nx.Graph()
+        # Netzwerkweiter Lock (reentrant: öffentliche Methoden rufen sich gegenseitig auf)
+        self._lock = threading.RLock()
+        # Topologie: Ort -> {Nachbar: Kanten-ID}
+        self._adj: Dict[str, Dict[str, int]] = {}
+        # Wird bei jeder Änderung an Knoten/Gewichten erhöht (Cache-Key)
+        self._weight_version = 0
+        # Wird nur bei neuen Knoten/Kanten erhöht (CSR-Struktur neu bauen)
+        self._topology_version = 0
+        # Knoten-Indizes
+        self._idx: Dict[str, int] = {}
+        self._names: List[str] = []
+        # Integer-Adjazenz: pro Knoten-Index Liste von (Nachbar-Index, Kanten-ID)
+        self._adj_int: List[List[Tuple[int, int]]] = []
+        # Kanten als SoA: Endpunkt-Indizes, Basis- und aktuelle Gewichte
+        self._edge_index: Dict[Tuple[str, str], int] = {}
+        self._edge_u = np.empty(0, dtype=np.int32)
+        self._edge_v = np.empty(0, dtype=np.int32)
+        self._base = np.empty(0, dtype=np.float64)
+        self._w = np.empty(0, dtype=np.float64)
+        # Delay-Faktor pro Kante, beim Schreiben der Gewichte gepflegt
+        self._delay = np.empty(0, dtype=np.float64)
+        # Nach Delay-Faktor sortierte Kanten-IDs (Index für get_congested_routes)
+        self._congested_order = np.empty(0, dtype=np.intp)
+        self._congested_sorted = np.empty(0, dtype=np.float64)
+        self._congested_version = -1
+        # CSR-Spiegel der Gewichte für SciPy-Dijkstra, lazy neu gebaut;
+        # _csr_perm bildet CSR-Datenslots auf Kanten-IDs ab
+        self._csr = None
+        self._csr_perm = np.empty(0, dtype=np.intp)
+        self._csr_indices = np.empty(0, dtype=np.int32)
+        self._csr_indptr = np.zeros(1, dtype=np.int32)
+        self._csr_version = -1
+        self._csr_topology = -1
+        # Flache Adjazenz (indptr/indices/Slot->Kanten-ID) für den Numba-Kernel
+        self._adj_indptr = np.zeros(1, dtype=np.int64)
+        self._adj_indices = np.empty(0, dtype=np.int64)
+        self._adj_eids = np.empty(0, dtype=np.intp)
+        self._adj_topology = -1
+        # Dijkstra-Ergebnisse der aktuellen Gewichts-Version (Startort bzw.
+        # (Start, Ziel) -> Ergebnis); bei Versionswechsel verworfen
+        self._sssp_cache: Dict[str, Optional[Tuple[int, np.ndarray, np.ndarray]]] = {}
+        self._pair_cache: Dict[Tuple[str, str], Optional[Tuple[float, Tuple[str, ...]]]] = {}
+        self._cache_version = -1
         self._build_default_network()
     
     def _build_default_network(self):
@@ -25,7 +179,7 @@ class RoadNetwork:
                  'Stuttgart', 'Düsseldorf', 'Dortmund', 'Leipzig']
         
         for node in nodes:
-            self.graph.add_node(node)
+            self.add_location(node)
         
         # Beispiel-Kanten mit Basis-Reisezeiten in Minuten
         edges = [
@@ -45,12 +199,18 @@ class RoadNetwork:
         
         for u, v, weight in edges:
             if u in nodes and v in nodes:
-                self.graph.add_edge(u, v, weight=weight, base_weight=weight)
+                self.add_route(u, v, weight)
     
     def add_location(self, location: str):
         """Füge einen neuen Standort hinzu."""
-        if not self.graph.has_node(location):
-            self.graph.add_node(location)
+        with self._lock:
+            if location not in self._idx:
+                self._idx[location] = len(self._names)
+                self._names.append(location)
+                self._adj_int.append([])
+                self._adj[location] = {}
+                self._weight_version += 1
+                self._topology_version += 1
     
     def add_route(self, start: str, end: str, travel_time: int):
         """
@@ -61,9 +221,36 @@ class RoadNetwork:
             end: Zielort
             travel_time: Reisezeit in Minuten
         """
-        self.add_location(start)
-        self.add_location(end)
-        self.graph.add_edge(start, end, weight=travel_time, base_weight=travel_time)
+        with self._lock:
+            self.add_location(start)
+            self.add_location(end)
+            
+            eid = self._edge_index.get((start, end))
+            if eid is None:
+                eid = len(self._w)
+                self._edge_index[(start, end)] = eid
+                self._edge_index[(end, start)] = eid
+                self._edge_u = np.append(self._edge_u, np.int32(self._idx[start]))
+                self._edge_v = np.append(self._edge_v, np.int32(self._idx[end]))
+                self._base = np.append(self._base, float(travel_time))
+                self._w = np.append(self._w, float(travel_time))
+                self._delay = np.append(self._delay, 0.0)
+                self._adj[start][end] = eid
+                self._adj[end][start] = eid
+                self._adj_int[self._idx[start]].append((self._idx[end], eid))
+                self._adj_int[self._idx[end]].append((self._idx[start], eid))
+                self._topology_version += 1
+            else:
+                self._base[eid] = travel_time
+                self._w[eid] = travel_time
+                self._delay[eid] = 0.0
+            self._weight_version += 1
+    
+    def _refresh_delay(self, eids=slice(None)):
+        """Berechnet die Delay-Faktoren der angegebenen Kanten neu."""
+        base = self._base[eids]
+        safe_base = np.where(base > 0, base, 1.0)
+        self._delay[eids] = np.where(base > 0, self._w[eids] / safe_base - 1, 0.0)
     
     def update_traffic(self, start: str, end: str, delay_factor: float):
         """
@@ -74,10 +261,61 @@ class RoadNetwork:
             end: Zielort
             delay_factor: Verzögerungsfaktor (0.0 - 1.0)
         """
-        if self.graph.has_edge(start, end):
-            base = self.graph[start][end]['base_weight']
-            new_weight = base * (1 + delay_factor)
-            self.graph[start][end]['weight'] = new_weight
+        with self._lock:
+            eid = self._edge_index.get((start, end))
+            if eid is not None:
+                new_weight = self._base[eid] * (1 + delay_factor)
+                if self._w[eid] != new_weight:
+                    self._w[eid] = new_weight
+                    self._refresh_delay(eid)
+                    self._weight_version += 1
+    
+    def update_traffic_batch(self, edges: Iterable[Tuple[str, str]], delays: Iterable[float]):
+        """
+        Aktualisiere mehrere Kantengewichte in einem Durchlauf.
+        
+        Sammelt die Kanten-IDs und schreibt alle Gewichte mit einem
+        Fancy-Index; die Netzwerk-Version wird höchstens einmal erhöht.
+        
+        Args:
+            edges: (start, end)-Paare; unbekannte Kanten werden ignoriert
+            delays: Verzögerungsfaktor pro Kante (z.B. np.ndarray)
+        """
+        with self._lock:
+            eids = []
+            factors = []
+            for edge, delay in zip(edges, delays):
+                eid = self._edge_index.get(edge)
+                if eid is not None:
+                    eids.append(eid)
+                    factors.append(1 + float(delay))
+            if not eids:
+                return
+            
+            eids = np.asarray(eids, dtype=np.intp)
+            new_weights = self._base[eids] * np.asarray(factors)
+            if not np.array_equal(self._w[eids], new_weights):
+                self._w[eids] = new_weights
+                self._refresh_delay(eids)
+                self._weight_version += 1
+    
+    def update_traffic_bulk(self, delay_factor: float):
+        """
+        Setzt einen globalen Verzögerungsfaktor auf alle Kanten.
+        
+        Eine vektorisierte Multiplikation über das gesamte Gewichts-Array;
+        die Netzwerk-Version wird nur erhöht, wenn sich etwas ändert.
+        
+        Args:
+            delay_factor: Verzögerungsfaktor (0.0 - 1.0)
+        """
+        with self._lock:
+            factor = 1 + delay_factor
+            if np.array_equal(self._w, self._base * factor):
+                return
+            np.multiply(self._base, factor, out=self._w)
+            self._refresh_delay()
+            self._weight_version += 1
     
     def shortest_path(self, start: str, end: str) -> Optional[List[str]]:
         """
@@ -86,10 +324,188 @@ class RoadNetwork:
         Returns:
             Liste von Orten auf dem kürzesten Pfad oder None
         """
-        try:
-            return nx.shortest_path(self.graph, start, end, weight='weight')
-        except (nx.NetworkXNoPath, nx.NodeNotFound):
+        with self._lock:
+            if not SCIPY_AVAILABLE:
+                result = self._dijkstra_cached(start, end)
+                return list(result[1]) if result is not None else None
+            
+            tree = self._sssp_cached(start)
+            target = self._idx.get(end)
+            if tree is None or target is None:
+                return None
+            
+            source, _, predecessors = tree
+            path = [target]
+            while path[-1] != source:
+                pred = predecessors[path[-1]]
+                if pred < 0:
+                    return None
+                path.append(pred)
+            return [self._names[i] for i in reversed(path)]
+    
+    def _ensure_csr(self) -> "csr_matrix":
+        """
+        Liefert die CSR-Gewichtsmatrix passend zur aktuellen Gewichts-Version.
+        
+        Neue Knoten/Kanten erfordern einen Neubau der Struktur; bei reinen
+        Gewichtsänderungen wird nur ein neues Daten-Array (über _csr_perm aus
+        dem SoA-Array) mit der bestehenden Struktur kombiniert. Die fertige
+        Matrix wird getauscht und nie in-place verändert. Versionsprüfung,
+        Neubau und Tausch laufen unter dem Netzwerk-Lock, den auch alle
+        Gewichts- und Topologie-Änderungen halten; Aufrufer halten ihn
+        während der gesamten Abfrage, sodass Matrix und Knoten-Indizes
+        zusammenpassen.
+        """
+        with self._lock:
+            version = self._weight_version
+            if self._csr_version == version:
+                return self._csr
+            
+            if self._csr_topology != self._topology_version:
+                n = len(self._names)
+                # Kanten-IDs (+1, damit keine Null-Einträge entstehen) als Daten,
+                # um nach der CSR-Sortierung die Slot-Zuordnung zu kennen
+                edge_ids = np.arange(1, len(self._w) + 1, dtype=np.float64)
+                structure = csr_matrix((edge_ids, (self._edge_u, self._edge_v)), shape=(n, n))
+                self._csr_perm = structure.data.astype(np.intp) - 1
+                self._csr_indices = structure.indices
+                self._csr_indptr = structure.indptr
+                self._csr_topology = self._topology_version
+            
+            # Gewichte direkt aus dem SoA-Array, keine Iteration über Kanten-Dicts
+            n = len(self._csr_indptr) - 1
+            self._csr = csr_matrix(
+                (self._w[self._csr_perm], self._csr_indices, self._csr_indptr), shape=(n, n)
+            )
+            self._csr_version = version
+            return self._csr
+    
+    def _current_caches(self) -> Tuple[dict, dict]:
+        """
+        Pfad-Caches der aktuellen Gewichts-Version.
+        
+        Bei einer Versionsänderung werden beide Caches verworfen, statt
+        veraltete Einträge (die nie wieder getroffen werden) zu behalten.
+        """
+        with self._lock:
+            version = self._weight_version
+            if self._cache_version != version:
+                self._sssp_cache = {}
+                self._pair_cache = {}
+                self._cache_version = version
+            return self._sssp_cache, self._pair_cache
+    
+    def _sssp_cached(self, source: str) -> Optional[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        SciPy-Dijkstra (C-Kernel über CSR) von einem Startort aus.
+        
+        Ein Lauf pro Startort und Gewichts-Version liefert Distanzen und
+        Pfade zu allen Zielen, z.B. für alle Zeitpunkte einer Stundenprognose.
+        
+        Returns:
+            (Quell-Index, Distanz-Array, Vorgänger-Array) oder None für unbekannte Orte
+        """
+        cache, _ = self._current_caches()
+        if source in cache:
+            return cache[source]
+        
+        source_idx = self._idx.get(source)
+        if source_idx is None:
+            return None
+        distances, predecessors = dijkstra(
+            self._ensure_csr(), directed=False, indices=source_idx, return_predecessors=True
+        )
+        cache[source] = (source_idx, distances, predecessors)
+        return cache[source]
+    
+    def _ensure_adj_arrays(self):
+        """
+        Flacht _adj_int in CSR-Arrays ab (nur bei Topologie-Änderungen).
+        """
+        if self._adj_topology == self._topology_version:
+            return
+        degrees = [len(neighbors) for neighbors in self._adj_int]
+        self._adj_indptr = np.zeros(len(degrees) + 1, dtype=np.int64)
+        np.cumsum(degrees, out=self._adj_indptr[1:])
+        flat = [entry for neighbors in self._adj_int for entry in neighbors]
+        self._adj_indices = np.array([v for v, _ in flat], dtype=np.int64)
+        self._adj_eids = np.array([eid for _, eid in flat], dtype=np.intp)
+        self._adj_topology = self._topology_version
+    
+    def _dijkstra_numba(self, source: int, target: int) -> Optional[Tuple[float, Tuple[str, ...]]]:
+        """
+        Heap-Dijkstra über die flache Adjazenz mit dem (JIT-kompilierten) Kernel.
+        
+        Returns:
+            (Länge, Pfad) oder None, falls kein Pfad existiert
+        """
+        self._ensure_adj_arrays()
+        distance, pred = _dijkstra_csr(
+            self._adj_indptr, self._adj_indices, self._w[self._adj_eids], source, target
+        )
+        if not np.isfinite(distance):
+            return None
+        path = [target]
+        while path[-1] != source:
+            path.append(int(pred[path[-1]]))
+        return float(distance), tuple(self._names[i] for i in reversed(path))
+    
+    def _dijkstra_cached(self, start: str, end: str) -> Optional[Tuple[float, Tuple[str, ...]]]:
+        """
+        Fallback ohne SciPy: Heap-Dijkstra mit Abbruch am Ziel, pro
+        (Start, Ziel) und Gewichts-Version gecacht.
+        
+        Returns:
+            (Länge, Pfad) oder None, falls kein Pfad existiert
+        """
+        _, cache = self._current_caches()
+        key = (start, end)
+        if key not in cache:
+            if len(cache) >= _PAIR_CACHE_SIZE:
+                cache.clear()
+            cache[key] = self._dijkstra_pair(start, end)
+        return cache[key]
+    
+    def _dijkstra_pair(self, start: str, end: str) -> Optional[Tuple[float, Tuple[str, ...]]]:
+        """
+        Heap-Dijkstra von start nach end (ohne Cache).
+        
+        Läuft mit Numba über den kompilierten CSR-Kernel, sonst über die
+        Integer-Adjazenz (Listen-Indexing statt String-Hashing); beide
+        brechen ab, sobald das Ziel vom Heap kommt.
+        
+        Returns:
+            (Länge, Pfad) oder None, falls kein Pfad existiert
+        """
+        source = self._idx.get(start)
+        target = self._idx.get(end)
+        if source is None or target is None:
             return None
+        if NUMBA_AVAILABLE:
+            return self._dijkstra_numba(source, target)
+        
+        adj = self._adj_int
+        weights = self._w.tolist()
+        dist = [math.inf] * len(adj)
+        pred = [-1] * len(adj)
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u == target:
+                path = [target]
+                while path[-1] != source:
+                    path.append(pred[path[-1]])
+                return d, tuple(self._names[i] for i in reversed(path))
+            if d > dist[u]:
+                continue
+            for v, eid in adj[u]:
+                nd = d + weights[eid]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return None
     
     def shortest_path_length(self, start: str, end: str) -> Optional[float]:
         """
@@ -98,34 +514,76 @@ class RoadNetwork:
         Returns:
             Gesamte Reisezeit in Minuten oder None
         """
-        try:
-            return nx.shortest_path_length(self.graph, start, end, weight='weight')
-        except (nx.NetworkXNoPath, nx.NodeNotFound):
-            return None
+        with self._lock:
+            if not SCIPY_AVAILABLE:
+                result = self._dijkstra_cached(start, end)
+                return float(result[0]) if result is not None else None
+            
+            tree = self._sssp_cached(start)
+            target = self._idx.get(end)
+            if tree is None or target is None:
+                return None
+            distance = tree[1][target]
+            return float(distance) if np.isfinite(distance) else None
+    
+    def route_segment_lengths(self, stops: List[str]) -> List[Optional[float]]:
+        """
+        Länge jedes Teilstücks einer Route (stops[i] -> stops[i + 1]).
+        
+        Mit SciPy ein einziger Dijkstra-Aufruf über alle Startorte
+        (indices=Array) statt eines Aufrufs pro Teilstück.
+        
+        Returns:
+            Reisezeit pro Teilstück in Minuten oder None (kein Pfad/unbekannter Ort)
+        """
+        with self._lock:
+            segments = list(zip(stops, stops[1:]))
+            if not SCIPY_AVAILABLE:
+                return [self.shortest_path_length(u, v) for u, v in segments]
+            
+            known = [(self._idx.get(u), self._idx.get(v)) for u, v in segments]
+            sources = sorted({u for u, v in known if u is not None and v is not None})
+            if not sources:
+                return [None] * len(segments)
+            
+            distances = dijkstra(self._ensure_csr(), directed=False, indices=sources)
+            row = {source: i for i, source in enumerate(sources)}
+            
+            lengths = []
+            for u, v in known:
+                if u is None or v is None or not np.isfinite(distances[row[u], v]):
+                    lengths.append(None)
+                else:
+                    lengths.append(float(distances[row[u], v]))
+            return lengths
     
     def get_neighbors(self, location: str) -> List[str]:
         """
         Gibt alle direkt erreichbaren Nachbarn zurück.
         """
-        if self.graph.has_node(location):
-            return list(self.graph.neighbors(location))
-        return []
+        with self._lock:
+            neighbors = self._adj.get(location)
+            return list(neighbors) if neighbors is not None else []
     
     def get_all_locations(self) -> List[str]:
         """Gibt alle Standorte im Netzwerk zurück."""
-        return list(self.graph.nodes())
+        with self._lock:
+            return list(self._names)
     
     def has_location(self, location: str) -> bool:
         """Prüft ob ein Standort existiert."""
-        return self.graph.has_node(location)
+        with self._lock:
+            return location in self._idx
     
     def get_edge_weight(self, start: str, end: str) -> Optional[float]:
         """
         Gibt das Gewicht (Reisezeit) einer Kante zurück.
         """
-        if self.graph.has_edge(start, end):
-            return self.graph[start][end]['weight']
-        return None
+        with self._lock:
+            eid = self._edge_index.get((start, end))
+            if eid is not None:
+                return float(self._w[eid])
+            return None
     
     def get_all_edges(self) -> List[Dict[str, any]]:
         """
@@ -134,14 +592,22 @@ class RoadNetwork:
         Returns:
             Liste von Dicts mit start, end, weight, base_weight
         """
+        with self._lock:
+            return self._edges_to_dicts(np.arange(len(self._w)))
+    
+    def _edges_to_dicts(self, eids: np.ndarray) -> List[Dict[str, any]]:
+        """Baut Kanten-Dicts nur für die angegebenen Kanten-IDs."""
         edges = []
-        for u, v, data in self.graph.edges(data=True):
+        for u, v, weight, base, delay in zip(
+            self._edge_u[eids].tolist(), self._edge_v[eids].tolist(),
+            self._w[eids].tolist(), self._base[eids].tolist(), self._delay[eids].tolist()
+        ):
             edges.append({
-                'start': u,
-                'end': v,
-                'weight': data.get('weight', 0),
-                'base_weight': data.get('base_weight', 0),
-                'delay_factor': (data.get('weight', 0) / data.get('base_weight', 1)) - 1 if data.get('base_weight', 1) > 0 else 0
+                'start': self._names[u],
+                'end': self._names[v],
+                'weight': weight,
+                'base_weight': base,
+                'delay_factor': delay
             })
         return edges
     
@@ -155,11 +621,16 @@ class RoadNetwork:
         Returns:
             Liste von Routen mit hohem Traffic
         """
-        congested = []
-        for edge in self.get_all_edges():
-            if edge['delay_factor'] >= threshold:
-                congested.append(edge)
-        return congested
+        with self._lock:
+            # Sortierung nur einmal pro Netzwerk-Version, danach Binärsuche
+            if self._congested_version != self._weight_version:
+                self._congested_order = np.argsort(self._delay, kind='stable')
+                self._congested_sorted = self._delay[self._congested_order]
+                self._congested_version = self._weight_version
+            
+            first = np.searchsorted(self._congested_sorted, threshold, side='left')
+            # Ergebnis wie bisher in Kanten-Reihenfolge
+            return self._edges_to_dicts(np.sort(self._congested_order[first:]))
 
 
 # Global instance
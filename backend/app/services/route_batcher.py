@@ -0,0 +1,130 @@
+"""
+Micro-Batching für Routen-Vorhersagen
+Bündelt gleichzeitig eintreffende /route/optimize-Requests zu einem predict_batch-Aufruf
+"""
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+
+from app.models.schemas import Order
+from app.services.traffic_api import traffic_client
+
+logger = logging.getLogger(__name__)
+
+
+class RouteBatcher:
+    """
+    Sammelt Routen-Anfragen in einer asyncio.Queue und verarbeitet sie gebündelt.
+    
+    Ein Hintergrund-Task wartet auf die erste Anfrage, sammelt dann bis zu
+    max_batch_size weitere Anfragen oder bis max_wait Sekunden vergangen
+    sind, und ruft agent.predict_batch() einmal für alle auf (Traffic-Update
+    und Modell-Overhead nur einmal pro Batch).
+    """
+    
+    def __init__(self, agent, max_batch_size: int = 32, max_wait: float = 0.005):
+        """
+        Args:
+            agent: RLAgent-Instanz mit predict_batch()
+            max_batch_size: Maximale Anzahl Anfragen pro Batch
+            max_wait: Maximale Wartezeit in Sekunden nach der ersten Anfrage
+        """
+        self.agent = agent
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Bereits aus der Queue genommener, noch nicht beantworteter Batch
+        self._in_flight: List[Tuple[List[Order], asyncio.Future]] = []
+    
+    @property
+    def running(self) -> bool:
+        """True, solange der Hintergrund-Task läuft."""
+        return self._task is not None and not self._task.done()
+    
+    def start(self):
+        """Startet den Hintergrund-Task (im laufenden Event-Loop aufrufen)."""
+        self.queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """
+        Stoppt den Hintergrund-Task; offene Anfragen werden abgebrochen.
+        
+        Betrifft sowohl wartende Anfragen in der Queue als auch den Batch,
+        den der Task gerade sammelt oder verarbeitet.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        pending = self._in_flight
+        self._in_flight = []
+        while not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+        for _, future in pending:
+            if not future.done():
+                future.cancel()
+    
+    async def submit(self, orders: List[Order]) -> List[str]:
+        """
+        Reiht eine Anfrage ein und wartet auf ihre Route.
+        
+        Args:
+            orders: Liste von Order-Objekten
+        
+        Returns:
+            Liste von Stopps in optimierter Reihenfolge
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((orders, future))
+        return await future
+    
+    async def _run(self):
+        """Hintergrund-Schleife: Batches sammeln und verarbeiten."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            self._in_flight = batch
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._process(batch)
+            self._in_flight = []
+    
+    async def _process(self, batch: List[Tuple[List[Order], asyncio.Future]]):
+        """Ein predict_batch-Aufruf für alle Anfragen, Ergebnisse an die Futures."""
+        # Abgebrochene Requests (z.B. Client getrennt) nicht mehr berechnen
+        batch = [(orders, future) for orders, future in batch if not future.done()]
+        if not batch:
+            return
+        
+        try:
+            delay_factor = await traffic_client.get_live_traffic_delay_async()
+            # CPU-lastige Vorhersage im Threadpool, damit der Event-Loop frei bleibt
+            results = await asyncio.to_thread(
+                self.agent.predict_batch, [orders for orders, _ in batch], delay_factor
+            )
+        except Exception as e:
+            logger.warning("Batch-Vorhersage fehlgeschlagen: %s", e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), stops in zip(batch, results):
+            if not future.done():
+                future.set_result(stops)
@@ -1,4 +1,6 @@
-from typing import List, Dict, Any, Optional
+import heapq
+import itertools
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 from app.models.schemas import Order
 
@@ -20,7 +22,9 @@ class Simulation:
             start_time: Startzeitpunkt
         """
         self.time = start_time
-        self.events: List[Dict[str, Any]] = []
+        # Min-Heap aus (timestamp, seq, event); seq hält die Einfügereihenfolge stabil
+        self.events: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._seq = itertools.count()
         self.vehicles_positions: Dict[str, str] = {}
         self.completed_orders: List[int] = []
         self.active_orders: List[Order] = []
@@ -32,9 +36,31 @@ class Simulation:
         Args:
             event: Event-Dict mit 'type', 'timestamp', 'data'
         """
-        self.events.append(event)
-        # Sortiere Events nach Timestamp
-        self.events.sort(key=lambda e: e.get("timestamp", float('inf')))
+        heapq.heappush(
+            self.events,
+            (event.get("timestamp", float('inf')), next(self._seq), event)
+        )
+
+    def add_events(self, events: List[Dict[str, Any]]):
+        """
+        Füge mehrere Events auf einmal hinzu.
+        
+        Große Batches werden angehängt und in O(n) per heapify
+        eingeordnet statt einzeln per heappush.
+        
+        Args:
+            events: Liste von Event-Dicts mit 'type', 'timestamp', 'data'
+        """
+        entries = [
+            (event.get("timestamp", float('inf')), next(self._seq), event)
+            for event in events
+        ]
+        if len(entries) >= len(self.events):
+            self.events.extend(entries)
+            heapq.heapify(self.events)
+        else:
+            for entry in entries:
+                heapq.heappush(self.events, entry)
 
     def run_step(self) -> Optional[Dict[str, Any]]:
         """
@@ -46,7 +72,7 @@ class Simulation:
         self.time += 1
         
         if self.events:
-            event = self.events.pop(0)
+            _, _, event = heapq.heappop(self.events)
             self._process_event(event)
             return event
         
@@ -92,6 +118,9 @@ class Simulation:
         """
         Holt den aktuellen Zustand der Simulation.
         
+        Enthält bewusst keine Wanduhrzeit: der Zustand hängt nur von
+        self.time ab und kann pro Simulationszeit gecacht werden.
+        
         Returns:
             State representation
         """
@@ -100,14 +129,23 @@ class Simulation:
             "events_remaining": len(self.events),
             "vehicles_positions": self.vehicles_positions,
             "active_orders": len(self.active_orders),
-            "completed_orders": len(self.completed_orders),
-            "timestamp": datetime.now().isoformat()
+            "completed_orders": len(self.completed_orders)
         }
 
+    def get_state_with_timestamp(self) -> Dict[str, Any]:
+        """
+        Wie get_state(), ergänzt um den aktuellen Zeitstempel (ISO-Format).
+        
+        Returns:
+            State representation inkl. 'timestamp'
+        """
+        return {**self.get_state(), "timestamp": datetime.now().isoformat()}
+
     def reset(self):
         """Setze Simulation zurück."""
         self.time = 0
         self.events = []
+        self._seq = itertools.count()
         self.vehicles_positions = {}
         self.completed_orders = []
         self.active_orders = []
\ No newline at end of file
@@ -1,10 +1,20 @@
 """
 Live Traffic Data Integration mit Autobahn API
 """
+import bisect
+import logging
+import time
+import httpx
 import requests
-from typing import Optional
+from typing import Optional, Tuple
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Obergrenzen (exklusiv) der Delay-Faktoren je Status-Label
+_STATUS_THRESHOLDS = (0.2, 0.5, 0.8)
+_STATUS_LABELS = ("frei", "leicht", "mittel", "stark")
+
 
 class TrafficAPIClient:
     """
@@ -14,52 +24,134 @@ class TrafficAPIClient:
     def __init__(self):
         self.base_url = "https://verkehr.autobahn.de/o/autobahn/"
         self.timeout = settings.AUTOBAHN_TIMEOUT
+        # Persistente Session: TCP/TLS-Verbindungen werden wiederverwendet
+        self.session = requests.Session()
+        # Wird im App-Lifespan geöffnet (Connection-Pooling für async Requests)
+        self.async_client: Optional[httpx.AsyncClient] = None
+        # Zuletzt geholter Delay-Faktor: (monotonic Zeitstempel, Wert)
+        self.cache_ttl = settings.TRAFFIC_CACHE_TTL
+        self._cached: Optional[Tuple[float, float]] = None
+    
+    def _get_cached_delay(self) -> Optional[float]:
+        """Liefert den gecachten Delay-Faktor, solange er jünger als die TTL ist."""
+        if self._cached is not None and time.monotonic() - self._cached[0] < self.cache_ttl:
+            return self._cached[1]
+        return None
+    
+    def _set_cached_delay(self, delay_factor: float) -> float:
+        """Merkt sich den Delay-Faktor mit aktuellem Zeitstempel."""
+        self._cached = (time.monotonic(), delay_factor)
+        return delay_factor
     
     def get_live_traffic_delay(self, region: Optional[str] = None) -> float:
         """
         Holt Live-Verkehrsstörungen von der Autobahn API.
         
+        Die Lage ändert sich im Minutenbereich: innerhalb der TTL
+        (settings.TRAFFIC_CACHE_TTL) wird der letzte Wert ohne HTTP-Request
+        zurückgegeben. Nach einem Fehler wird 0.0 geliefert, aber nicht
+        gecacht: der nächste Aufruf fragt die API erneut.
+        
         Args:
             region: Spezifische Region/Autobahn (z.B. "A1", "A3")
         
         Returns:
             Verzögerungsfaktor (0.0 = kein Delay, 1.0 = maximales Delay)
         """
+        cached = self._get_cached_delay()
+        if cached is not None:
+            return cached
+        delay_factor = self._fetch_live_traffic_delay(region)
+        if delay_factor is None:
+            return 0.0
+        return self._set_cached_delay(delay_factor)
+    
+    def _fetch_live_traffic_delay(self, region: Optional[str] = None) -> Optional[float]:
+        """Ein HTTP-Request an die Autobahn API (ohne Cache); None bei Fehlern."""
         try:
             # Autobahn API v3 endpoint
             url = f"{self.base_url}"
             
             # Fallback auf alternative API falls Hauptendpoint nicht verfügbar
             try:
-                response = requests.get(url, timeout=self.timeout)
+                response = self.session.get(url, timeout=self.timeout)
                 response.raise_for_status()
                 data = response.json()
             except Exception:
                 # Fallback: Nutze öffentliche Verkehrsmeldungen-API
                 url = "https://verkehr.autobahn.de/o/autobahn/"
-                response = requests.get(url, timeout=self.timeout)
+                response = self.session.get(url, timeout=self.timeout)
                 data = response.json() if response.status_code == 200 else {}
             
-            # Extrahiere Störungsmeldungen
-            events = []
-            if isinstance(data, dict):
-                events = data.get("roadworks", []) or []
-                events.extend(data.get("warning", []) or [])
-                events.extend(data.get("closure", []) or [])
-            
-            # Berechne Delay-Faktor basierend auf Anzahl der Ereignisse
-            # Normalisiert auf 0.0 - 1.0
-            delay_factor = min(1.0, len(events) / 50.0)
-            
-            print(f"[Traffic API] Found {len(events)} events, delay factor: {delay_factor:.2f}")
-            return delay_factor
+            return self._delay_factor_from_data(data)
             
         except requests.RequestException as e:
-            print(f"[Traffic API] Error fetching data: {e}")
-            return 0.0
+            logger.warning("[Traffic API] Error fetching data: %s", e)
+            return None
         except Exception as e:
-            print(f"[Traffic API] Unexpected error: {e}")
+            logger.warning("[Traffic API] Unexpected error: %s", e)
+            return None
+    
+    async def get_live_traffic_delay_async(self, region: Optional[str] = None) -> float:
+        """
+        Async-Variante von get_live_traffic_delay() auf Basis von httpx.
+        
+        Nutzt den im App-Lifespan geöffneten AsyncClient, sonst einen
+        kurzlebigen Client für diesen einen Request. Teilt sich den
+        TTL-Cache mit der synchronen Variante (Fehler werden nicht gecacht).
+        
+        Returns:
+            Verzögerungsfaktor (0.0 = kein Delay, 1.0 = maximales Delay)
+        """
+        cached = self._get_cached_delay()
+        if cached is not None:
+            return cached
+        delay_factor = await self._fetch_live_traffic_delay_async(region)
+        if delay_factor is None:
             return 0.0
+        return self._set_cached_delay(delay_factor)
+    
+    async def _fetch_live_traffic_delay_async(self, region: Optional[str] = None) -> Optional[float]:
+        """Ein async HTTP-Request an die Autobahn API (ohne Cache); None bei Fehlern."""
+        try:
+            if self.async_client is not None:
+                response = await self.async_client.get(self.base_url, timeout=self.timeout)
+            else:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    response = await client.get(self.base_url)
+            data = response.json() if response.status_code == 200 else {}
+            return self._delay_factor_from_data(data)
+            
+        except httpx.HTTPError as e:
+            logger.warning("[Traffic API] Error fetching data: %s", e)
+            return None
+        except Exception as e:
+            logger.warning("[Traffic API] Unexpected error: %s", e)
+            return None
+    
+    def _delay_factor_from_data(self, data) -> float:
+        """
+        Berechnet den Delay-Faktor aus einer Autobahn-API-Antwort.
+        """
+        # Extrahiere Störungsmeldungen
+        events = []
+        if isinstance(data, dict):
+            events = data.get("roadworks", []) or []
+            events.extend(data.get("warning", []) or [])
+            events.extend(data.get("closure", []) or [])
+        
+        # Berechne Delay-Faktor basierend auf Anzahl der Ereignisse
+        # Normalisiert auf 0.0 - 1.0
+        delay_factor = min(1.0, len(events) / 50.0)
+        
+        logger.debug("[Traffic API] Found %d events, delay factor: %.2f", len(events), delay_factor)
+        return delay_factor
+    
+    async def aclose(self):
+        """Schließt den async HTTP-Client (App-Shutdown)."""
+        if self.async_client is not None:
+            await self.async_client.aclose()
+            self.async_client = None
     
     def get_traffic_info_for_route(self, start: str, end: str) -> dict:
         """
@@ -72,8 +164,27 @@ class TrafficAPIClient:
         Returns:
             Dict mit Verkehrsinformationen
         """
-        delay_factor = self.get_live_traffic_delay()
+        return self._route_info(start, end, self.get_live_traffic_delay())
+    
+    async def get_traffic_info_for_route_async(self, start: str, end: str) -> dict:
+        """
+        Async-Variante von get_traffic_info_for_route().
         
+        Der HTTP-Request blockiert den Event-Loop nicht und kann per
+        asyncio.gather() mit lokaler Arbeit (z.B. Environment-Aufbau)
+        überlappt werden.
+        
+        Args:
+            start: Startort
+            end: Zielort
+        
+        Returns:
+            Dict mit Verkehrsinformationen
+        """
+        return self._route_info(start, end, await self.get_live_traffic_delay_async())
+    
+    def _route_info(self, start: str, end: str, delay_factor: float) -> dict:
+        """Baut das Verkehrsinfo-Dict für eine Route aus dem Delay-Faktor."""
         return {
             "start": start,
             "end": end,
@@ -86,14 +197,7 @@ class TrafficAPIClient:
         """
         Konvertiert Delay-Faktor in lesbare Status-Labels.
         """
-        if delay_factor < 0.2:
-            return "frei"
-        elif delay_factor < 0.5:
-            return "leicht"
-        elif delay_factor < 0.8:
-            return "mittel"
-        else:
-            return "stark"
+        return _STATUS_LABELS[bisect.bisect_right(_STATUS_THRESHOLDS, delay_factor)]
 
 
 # Global instance
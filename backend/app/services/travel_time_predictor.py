@@ -2,14 +2,20 @@
 Travel Time Prediction Service
 Vorhersagt optimale Startzeitpunkte basierend auf historischen Verkehrsdaten
 """
+import bisect
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
-import random
 import math
 
+import numpy as np
+
 from app.services.traffic_api import traffic_client
 from app.services.road_network import road_network
 
+# Obergrenzen (exklusiv) der Delay-Faktoren je Traffic-Stufe
+_TRAFFIC_THRESHOLDS = (0.2, 0.4, 0.6, 0.8)
+_TRAFFIC_LEVELS = ('sehr gering', 'gering', 'mittel', 'hoch', 'sehr hoch')
+
 
 class TravelTimePredictor:
     """
@@ -45,6 +51,16 @@ class TravelTimePredictor:
                 (20, 0.1),
             ]
         }
+        
+        # Interpolierte Delay-Faktoren für alle (Tagestyp, Stunde)-Kombinationen,
+        # Zeile 0 = Wochentag, Zeile 1 = Wochenende
+        self._hour_table = np.array([
+            [self._interpolate_hour_factor(day_type, hour) for hour in range(24)]
+            for day_type in ('weekday', 'weekend')
+        ], dtype=np.float64)
+        
+        # Eigener Zufallsgenerator für die Variation (Einzel- und Batch-Vorhersagen)
+        self._rng = np.random.default_rng()
     
     def _get_day_type(self, dt: datetime) -> str:
         """Bestimmt ob Wochentag oder Wochenende."""
@@ -54,13 +70,18 @@ class TravelTimePredictor:
         """
         Holt Delay-Faktor für eine bestimmte Stunde basierend auf Mustern.
         
-        MVP: Interpoliert zwischen definierten Zeitpunkten
+        MVP: Lookup in der vorab interpolierten Stundentabelle
         Production: ML-Modell mit echten historischen Daten
         """
-        day_type = self._get_day_type(dt)
-        pattern = self.traffic_patterns[day_type]
+        return float(self._hour_table[1 if dt.weekday() >= 5 else 0, dt.hour])
+    
+    def _interpolate_hour_factor(self, day_type: str, hour: int) -> float:
+        """
+        Interpoliert den Delay-Faktor zwischen den definierten Zeitpunkten.
         
-        hour = dt.hour
+        Wird nur beim Aufbau der Stundentabelle aufgerufen.
+        """
+        pattern = self.traffic_patterns[day_type]
         
         # Finde nächste definierte Zeitpunkte
         prev_point = None
@@ -93,7 +114,7 @@ class TravelTimePredictor:
         """Fügt realistische Zufallsvariation hinzu."""
         # ±20% Variation
         variance = delay * 0.2
-        return max(0, delay + random.uniform(-variance, variance))
+        return max(0, delay + self._rng.uniform(-variance, variance))
     
     def predict_travel_time(
         self, 
@@ -127,7 +148,7 @@ class TravelTimePredictor:
         pattern_delay = self._add_randomness(pattern_delay)
         
         # Hole aktuelle Live-Daten (falls Abfahrt in naher Zukunft)
-        hours_until = (departure_time - datetime.now()).total_seconds() / 3600
+        hours_until = (departure_time - datetime.now(departure_time.tzinfo)).total_seconds() / 3600
         live_delay = 0.0
         
         if 0 <= hours_until <= 2:
@@ -139,6 +160,18 @@ class TravelTimePredictor:
             # Für entfernte Zukunft nur Muster
             final_delay = pattern_delay
         
+        return self._build_prediction(start, end, departure_time, base_time, final_delay, hours_until)
+    
+    def _build_prediction(
+        self,
+        start: str,
+        end: str,
+        departure_time: datetime,
+        base_time: float,
+        final_delay: float,
+        hours_until: float
+    ) -> Dict[str, Any]:
+        """Baut das Vorhersage-Dict für eine Abfahrtszeit."""
         predicted_time = base_time * (1 + final_delay)
         
         return {
@@ -155,16 +188,7 @@ class TravelTimePredictor:
     
     def _get_traffic_level(self, delay_factor: float) -> str:
         """Konvertiert Delay-Faktor in lesbare Traffic-Stufe."""
-        if delay_factor < 0.2:
-            return 'sehr gering'
-        elif delay_factor < 0.4:
-            return 'gering'
-        elif delay_factor < 0.6:
-            return 'mittel'
-        elif delay_factor < 0.8:
-            return 'hoch'
-        else:
-            return 'sehr hoch'
+        return _TRAFFIC_LEVELS[bisect.bisect_right(_TRAFFIC_THRESHOLDS, delay_factor)]
     
     def find_optimal_departure_time(
         self,
@@ -190,45 +214,55 @@ class TravelTimePredictor:
         if earliest_departure is None:
             earliest_departure = datetime.now()
         
-        # Teste jede Stunde im Zeitfenster
-        predictions = []
-        
-        for hour_offset in range(hours_window):
-            test_time = earliest_departure + timedelta(hours=hour_offset)
-            
-            prediction = self.predict_travel_time(start, end, test_time)
-            
-            if 'error' not in prediction:
-                arrival_time = test_time + timedelta(minutes=prediction['predicted_time_minutes'])
-                
-                # Prüfe ob Ankunft rechtzeitig
-                valid = True
-                if latest_arrival and arrival_time > latest_arrival:
-                    valid = False
-                
-                predictions.append({
-                    **prediction,
-                    'arrival_time': arrival_time.isoformat(),
-                    'valid': valid,
-                    'hour_offset': hour_offset
-                })
+        # Teste jede Stunde im Zeitfenster (ein Batch statt Einzel-Vorhersagen)
+        departures = [earliest_departure + timedelta(hours=h) for h in range(hours_window)]
+        predictions = self._predict_departures(start, end, departures)
         
         if not predictions:
             return {'error': 'No valid predictions found'}
         
-        # Finde optimale Zeit (minimale Reisezeit)
-        valid_predictions = [p for p in predictions if p.get('valid', True)]
+        # Parallele Arrays für Auswahl ohne Python-Vergleiche pro Element
+        predicted_times = np.fromiter(
+            (p['predicted_time_minutes'] for p in predictions), dtype=np.float64, count=len(predictions)
+        )
+        arrival_times = [
+            dt + timedelta(minutes=p['predicted_time_minutes'])
+            for dt, p in zip(departures, predictions)
+        ]
+        # Prüfe ob Ankunft rechtzeitig
+        if latest_arrival:
+            valid_mask = np.fromiter(
+                (arrival <= latest_arrival for arrival in arrival_times), dtype=bool, count=len(predictions)
+            )
+        else:
+            valid_mask = np.ones(len(predictions), dtype=bool)
+        
+        predictions = [
+            {
+                **prediction,
+                'arrival_time': arrival.isoformat(),
+                'valid': bool(valid),
+                'hour_offset': hour_offset
+            }
+            for hour_offset, (prediction, arrival, valid) in enumerate(
+                zip(predictions, arrival_times, valid_mask)
+            )
+        ]
         
-        if not valid_predictions:
-            valid_predictions = predictions  # Fallback
+        # Falls keine Abfahrt rechtzeitig ankommt: alle berücksichtigen (Fallback)
+        if not valid_mask.any():
+            valid_mask[:] = True
+        masked_times = np.where(valid_mask, predicted_times, np.inf)
         
-        optimal = min(valid_predictions, key=lambda p: p['predicted_time_minutes'])
+        # Optimum + Top 3 Alternativen: die k kleinsten Reisezeiten per Partition,
+        # dann stabil sortiert (bei Gleichstand gewinnt die frühere Abfahrt)
+        k = min(4, int(valid_mask.sum()))
+        kth_time = np.partition(masked_times, k - 1)[k - 1]
+        candidates = np.flatnonzero(masked_times <= kth_time)
+        ranked = candidates[np.argsort(masked_times[candidates], kind='stable')][:k]
         
-        # Top 3 Alternativen
-        alternatives = sorted(
-            valid_predictions, 
-            key=lambda p: p['predicted_time_minutes']
-        )[1:4]
+        optimal = predictions[ranked[0]]
+        alternatives = [predictions[i] for i in ranked[1:]]
         
         return {
             'recommendation': optimal,
@@ -254,17 +288,72 @@ class TravelTimePredictor:
         Returns:
             Liste von stündlichen Vorhersagen
         """
+        return self.get_hourly_forecast_batch(start, end, np.arange(hours, dtype=np.int64))
+    
+    def get_hourly_forecast_batch(
+        self,
+        start: str,
+        end: str,
+        timestamps: np.ndarray
+    ) -> List[Dict[str, Any]]:
+        """
+        Vektorisierte Prognose für mehrere Abfahrtszeitpunkte.
+        
+        Basis-Reisezeit und Live-Daten werden nur einmal geholt,
+        Zufallsvariation und Delay-Mix als NumPy-Batch berechnet.
+        
+        Args:
+            start: Startort
+            end: Zielort
+            timestamps: Abfahrts-Offsets in Stunden ab jetzt
+        
+        Returns:
+            Liste von Vorhersagen (eine pro Offset)
+        """
         now = datetime.now()
-        forecast = []
+        departures = [now + timedelta(hours=float(h)) for h in np.asarray(timestamps)]
+        return self._predict_departures(start, end, departures)
+    
+    def _predict_departures(
+        self,
+        start: str,
+        end: str,
+        departures: List[datetime]
+    ) -> List[Dict[str, Any]]:
+        """
+        Batch-Vorhersage für eine Liste von Abfahrtszeitpunkten.
         
-        for hour_offset in range(hours):
-            time = now + timedelta(hours=hour_offset)
-            prediction = self.predict_travel_time(start, end, time)
-            
-            if 'error' not in prediction:
-                forecast.append(prediction)
+        Returns:
+            Liste von Vorhersagen oder leere Liste falls keine Route existiert
+        """
+        base_time = road_network.shortest_path_length(start, end)
+        
+        if base_time is None or not departures:
+            return []
+        
+        now = datetime.now(departures[0].tzinfo)
+        hours_until = np.array([(dt - now).total_seconds() / 3600 for dt in departures])
+        
+        # Muster-Delay per Fancy-Indexing in die Stundentabelle, inkl. ±20% Variation
+        n = len(departures)
+        day_idx = np.fromiter((dt.weekday() >= 5 for dt in departures), dtype=np.intp, count=n)
+        hour_idx = np.fromiter((dt.hour for dt in departures), dtype=np.intp, count=n)
+        pattern_delay = self._hour_table[day_idx, hour_idx]
+        pattern_delay = np.maximum(
+            0, pattern_delay + self._rng.uniform(-0.2, 0.2, size=n) * pattern_delay
+        )
+        
+        # Live-Daten nur für nahe Zukunft, ein API-Call für alle Zeitpunkte
+        final_delay = pattern_delay
+        near_future = (hours_until >= 0) & (hours_until <= 2)
+        if near_future.any():
+            live_delay = traffic_client.get_live_traffic_delay()
+            final_delay = np.where(near_future, 0.7 * live_delay + 0.3 * pattern_delay, pattern_delay)
         
-        return forecast
+        return [
+            self._build_prediction(start, end, dt, base_time, float(delay), float(h))
+            for dt, delay, h in zip(departures, final_delay, hours_until)
+        ]
 
 
 # Global instance
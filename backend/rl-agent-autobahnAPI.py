@@ -1,11 +1,15 @@
+import logging
 import requests
 import random
+from collections import deque
 import numpy as np
 import torch
 import torch.nn as nn
 import torch.optim as optim
 import networkx as nx
 
+logger = logging.getLogger(__name__)
+
 # ============================================================
 # 1. Live-Verkehrsdaten holen (Autobahn API)
 # ============================================================
@@ -22,11 +26,11 @@ def get_live_traffic_delay():
 
         # Delay proportional zur Anzahl der Meldungen
         delay_factor = min(1.0, len(events) / 50.0)
-        print(f"[Live Traffic Delay Factor] {delay_factor}")
+        logger.debug("[Live Traffic Delay Factor] %s", delay_factor)
         return delay_factor
 
     except Exception as e:
-        print("Fehler beim Abruf der Live-Daten:", e)
+        logger.warning("Fehler beim Abruf der Live-Daten: %s", e)
         return 0.0
 
 
@@ -67,23 +71,25 @@ class TrafficEnv:
         self.nodes = list(self.G.nodes())
         self.start = 'A'
         self.goal = 'C'
+        # Knoten-Index und Distanz zum (festen) Ziel einmalig vorberechnen
+        self._node_to_idx = {n: i for i, n in enumerate(self.nodes)}
+        self._dist_to_goal = dict(nx.single_source_shortest_path_length(self.G, self.goal))
         self.reset()
 
     def reset(self):
         self.current = self.start
+        # Live-Verkehrslage einmal pro Episode statt bei jedem Schritt abrufen
+        self.traffic_delay = get_live_traffic_delay()
         return self.state()
 
     def state(self):
         """
         Rückgabe: One-Hot Knotenposition + Distanz zum Ziel
         """
-        one_hot = np.zeros(len(self.nodes))
-        idx = self.nodes.index(self.current)
-        one_hot[idx] = 1
-
-        dist = nx.shortest_path_length(self.G, self.current, self.goal)
+        one_hot = np.zeros(len(self.nodes), dtype=np.float32)
+        one_hot[self._node_to_idx[self.current]] = 1
 
-        return np.concatenate([one_hot, [dist]])
+        return np.concatenate([one_hot, [self._dist_to_goal[self.current]]])
 
     def step(self, action):
         """
@@ -95,10 +101,8 @@ class TrafficEnv:
             # Illegale Aktion → harte Strafe
             return self.state(), -10, False
 
-        traffic_delay = get_live_traffic_delay()
-
         base_cost = self.G[self.current][next_node]['weight']
-        cost = base_cost * (1 + traffic_delay)
+        cost = base_cost * (1 + self.traffic_delay)
 
         reward = -cost
 
@@ -134,7 +138,7 @@ class DQN(nn.Module):
 # 5. Training Loop
 # ============================================================
 
-def train_agent(episodes=20):
+def train_agent(episodes=20, batch_size=32, replay_size=10000):
     env = TrafficEnv()
 
     input_dim = len(env.state())
@@ -147,35 +151,54 @@ def train_agent(episodes=20):
     gamma = 0.9
     epsilon = 0.2
 
+    # Replay-Buffer: (state, action, reward, next_state, done)
+    replay = deque(maxlen=replay_size)
+
+    # Tensoren einmalig anlegen und pro Schritt/Batch nur befüllen
+    s = torch.empty(input_dim)
+    state_buf = torch.empty(batch_size, input_dim)
+    next_state_buf = torch.empty(batch_size, input_dim)
+    action_buf = torch.empty(batch_size, dtype=torch.long)
+    reward_buf = torch.empty(batch_size)
+    done_buf = torch.empty(batch_size)
+
     for ep in range(episodes):
         state = env.reset()
         total_reward = 0
 
         for t in range(20):  # max steps
-            s = torch.tensor(state, dtype=torch.float32)
-
             # ε-greedy Policy
             if random.random() < epsilon:
                 action = random.randint(0, output_dim - 1)
             else:
+                s.copy_(torch.from_numpy(state))
                 with torch.no_grad():
                     action = model(s).argmax().item()
 
             next_state, reward, done = env.step(action)
             total_reward += reward
 
-            # Q-Learning Update
-            q_values = model(s)
-            next_q_values = model(torch.tensor(next_state, dtype=torch.float32))
+            replay.append((state, action, reward, next_state, done))
 
-            target = q_values.clone()
-            target[action] = reward + gamma * next_q_values.max().item()
+            # Q-Learning Update auf einem Minibatch statt auf Einzelschritten
+            if len(replay) >= batch_size:
+                for i, (b_s, b_a, b_r, b_ns, b_d) in enumerate(random.sample(replay, batch_size)):
+                    state_buf[i].copy_(torch.from_numpy(b_s))
+                    next_state_buf[i].copy_(torch.from_numpy(b_ns))
+                    action_buf[i] = b_a
+                    reward_buf[i] = b_r
+                    done_buf[i] = float(b_d)
+
+                q_values = model(state_buf).gather(1, action_buf.unsqueeze(1)).squeeze(1)
+                with torch.no_grad():
+                    next_q_values = model(next_state_buf).max(dim=1).values
+                target = reward_buf + gamma * next_q_values * (1 - done_buf)
 
-            loss = loss_fn(q_values, target.detach())
+                loss = loss_fn(q_values, target)
 
-            optimizer.zero_grad()
-            loss.backward()
-            optimizer.step()
+                optimizer.zero_grad()
+                loss.backward()
+                optimizer.step()
 
             state = next_state
 
@@ -1,13 +1,23 @@
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.api.v1 import endpoints
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    """FastAPI TestClient fixture"""
+    """FastAPI TestClient fixture (einmal pro Testlauf)"""
     return TestClient(app)
 
-@pytest.fixture
+@pytest.fixture(autouse=True)
+def reset_app_state():
+    """Setzt veränderlichen App-Zustand zwischen Tests zurück"""
+    yield
+    agent = getattr(app.state, "agent", None)
+    if agent is not None:
+        agent.training_history.clear()
+    endpoints._route_cache.clear()
+
+@pytest.fixture(scope="session")
 def sample_orders():
     """Sample orders for testing"""
     return [
@@ -31,7 +41,7 @@ def sample_orders():
         }
     ]
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_vehicles():
     """Sample vehicles for testing"""
     return [
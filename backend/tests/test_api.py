@@ -7,12 +7,10 @@ from app.services.environment import TourEnvironment
 from app.services.simulation import Simulation
 from app.services.data_loader import DataLoader
 
-client = TestClient(app)
-
 # ============== API Tests ==============
 
 class TestAPIHealth:
-    def test_health_check(self):
+    def test_health_check(self, client):
         """Test /health Endpunkt"""
         response = client.get("/health")
         assert response.status_code == 200
@@ -21,7 +19,7 @@ class TestAPIHealth:
         assert "service" in data
 
 class TestAPIRouting:
-    def test_optimize_route_basic(self):
+    def test_optimize_route_basic(self, client):
         """Test /api/v1/route/optimize mit Dummy-Daten"""
         payload = [
             {"order_id": 1, "start_location": "Berlin", "end_location": "München", "priority": 1},
@@ -35,19 +33,88 @@ class TestAPIRouting:
         assert "estimated_duration_minutes" in data
         assert data["estimated_duration_minutes"] > 0
 
-    def test_optimize_route_empty(self):
+    def test_optimize_route_repeated_payload(self, client):
+        """Test identische Payloads liefern dieselben Stops (Cache-Hit)"""
+        payload = [
+            {"order_id": 7, "start_location": "Köln", "end_location": "Berlin", "priority": 1},
+        ]
+        first = client.post("/api/v1/route/optimize", json=payload)
+        second = client.post("/api/v1/route/optimize", json=payload)
+        assert first.status_code == 200
+        assert second.status_code == 200
+        assert first.json()["stops"] == second.json()["stops"]
+
+    def test_optimize_route_cache_header(self, client):
+        """Test X-Cache Header zeigt MISS beim ersten und HIT beim zweiten Aufruf"""
+        payload = [
+            {"order_id": 8, "start_location": "Dortmund", "end_location": "Leipzig", "priority": 3},
+        ]
+        first = client.post("/api/v1/route/optimize", json=payload)
+        second = client.post("/api/v1/route/optimize", json=payload)
+        assert first.headers["X-Cache"] == "MISS"
+        assert second.headers["X-Cache"] == "HIT"
+
+    def test_optimize_route_corrupt_redis_value(self, client, monkeypatch):
+        """Test nicht dekodierbare Redis-Werte werden als Cache-Miss behandelt"""
+        class CorruptRedis:
+            def __init__(self):
+                self.stored = {}
+            
+            async def get(self, key):
+                return b"\xffkein json"
+            
+            async def setex(self, key, ttl, value):
+                self.stored[key] = value
+        
+        redis = CorruptRedis()
+        monkeypatch.setattr(app.state, "redis", redis, raising=False)
+        payload = [
+            {"order_id": 9, "start_location": "Bremen", "end_location": "Dresden", "priority": 2},
+        ]
+        response = client.post("/api/v1/route/optimize", json=payload)
+        assert response.status_code == 200
+        assert response.headers["X-Cache"] == "MISS"
+        assert len(redis.stored) == 1
+
+    def test_optimize_route_batched(self):
+        """Test /route/optimize über den im Lifespan gestarteten Micro-Batcher"""
+        payload = [
+            {"order_id": 9, "start_location": "Hamburg", "end_location": "Stuttgart", "priority": 2},
+        ]
+        with TestClient(app) as lifespan_client:
+            assert app.state.route_batcher.running
+            response = lifespan_client.post("/api/v1/route/optimize", json=payload)
+        assert response.status_code == 200
+        assert response.json()["stops"] == ["Hamburg", "Stuttgart"]
+        assert not app.state.route_batcher.running
+
+    def test_optimize_route_openapi_body(self, client):
+        """Test Request-Body von /route/optimize ist im OpenAPI-Schema dokumentiert"""
+        schema = client.get("/api/v1/openapi.json").json()
+        body = schema["paths"]["/api/v1/route/optimize"]["post"]["requestBody"]
+        items = body["content"]["application/json"]["schema"]["items"]
+        assert "order_id" in items["properties"]
+
+    def test_optimize_route_empty(self, client):
         """Test /api/v1/route/optimize mit leerer Liste"""
         response = client.post("/api/v1/route/optimize", json=[])
         assert response.status_code == 400
 
-    def test_get_route(self):
+    def test_optimize_route_invalid_payload(self, client):
+        """Test /api/v1/route/optimize mit ungültigen Orders"""
+        response = client.post("/api/v1/route/optimize", json=[{"order_id": "abc"}])
+        assert response.status_code == 422
+        response = client.post("/api/v1/route/optimize", content=b"not json")
+        assert response.status_code == 422
+
+    def test_get_route(self, client):
         """Test GET /api/v1/route/{route_id}"""
         response = client.get("/api/v1/route/test_route_123")
         assert response.status_code == 200
         data = response.json()
         assert data["route_id"] == "test_route_123"
 
-    def test_get_stats(self):
+    def test_get_stats(self, client):
         """Test GET /api/v1/stats"""
         response = client.get("/api/v1/stats")
         assert response.status_code == 200
@@ -55,6 +122,53 @@ class TestAPIRouting:
         assert "total_routes_optimized" in data
         assert "avg_duration_minutes" in data
 
+    def test_get_stats_not_modified(self, client):
+        """Test GET /api/v1/stats mit If-None-Match"""
+        etag = client.get("/api/v1/stats").headers["etag"]
+        response = client.get("/api/v1/stats", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+class TestAPITravelTime:
+    def test_travel_time_forecast(self, client):
+        """Test GET /api/v1/travel-time/forecast"""
+        response = client.get("/api/v1/travel-time/forecast?start=Berlin&end=Köln&hours=6")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["forecast_hours"] == 6
+        assert len(data["forecast"]) == 6
+        assert all(p["predicted_time_minutes"] >= p["base_time_minutes"] for p in data["forecast"])
+
+    def test_travel_time_forecast_unknown_location(self, client):
+        """Test forecast mit unbekanntem Ort"""
+        response = client.get("/api/v1/travel-time/forecast?start=Berlin&end=Atlantis")
+        assert response.status_code == 404
+
+    def test_travel_time_predict_utc_suffix(self, client):
+        """Test ISO-Zeitstempel mit 'Z'-Suffix"""
+        response = client.get(
+            "/api/v1/travel-time/predict?start=Berlin&end=Köln&departure_time=2030-01-07T08:00:00Z"
+        )
+        assert response.status_code == 200
+        assert response.json()["departure_time"].startswith("2030-01-07T08:00:00")
+
+    def test_travel_time_predict_invalid_datetime(self, client):
+        """Test ungültiges Datumsformat"""
+        response = client.get(
+            "/api/v1/travel-time/predict?start=Berlin&end=Köln&departure_time=morgen"
+        )
+        assert response.status_code == 400
+
+    def test_optimal_departure(self, client):
+        """Test GET /api/v1/travel-time/optimal-departure"""
+        response = client.get("/api/v1/travel-time/optimal-departure?start=Berlin&end=Köln&hours_window=6")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_options_analyzed"] == 6
+        assert len(data["alternatives"]) == 3
+        best = data["recommendation"]["predicted_time_minutes"]
+        assert all(best <= alt["predicted_time_minutes"] for alt in data["alternatives"])
+
 # ============== RL Agent Tests ==============
 
 class TestRLAgent:
@@ -112,10 +226,13 @@ class TestTourEnvironment:
         """Test TourEnvironment.step()"""
         env = TourEnvironment()
         action = {"assign": {"order_id": 1, "vehicle_id": "v1"}}
-        state, reward, done = env.step(action)
-        assert env.time == 1
+        state, reward, terminated, truncated, info = env.step(action)
         assert isinstance(state, dict)
         assert isinstance(reward, float)
+        # Ohne Aufträge endet die Episode sofort (Autoreset)
+        assert terminated and not truncated
+        assert info["final_observation"]["time"] == 1
+        assert env.time == 0
 
     def test_environment_add_vehicle(self):
         """Test Environment Vehicle Management"""
@@ -190,5 +307,82 @@ class TestDataLoader:
         assert len(orders) == 2
         assert orders[0].order_id == 1
 
+    def test_load_orders_json(self, tmp_path):
+        """Test DataLoader mit JSON-Datei (Array und 'orders'-Objekt)"""
+        loader = DataLoader()
+        path = tmp_path / "orders.json"
+        path.write_text(
+            '{"orders": [{"id": 1, "start": "Berlin", "end": "Köln", "priority": 2}, {"order_id": "x"}]}',
+            encoding="utf-8"
+        )
+        orders = loader.load_orders(str(path))
+        assert len(orders) == 1
+        assert orders[0].start_location == "Berlin"
+        assert orders[0].priority == 2
+
+    def test_load_orders_csv(self, tmp_path):
+        """Test DataLoader mit CSV-Datei inkl. Alias-Spalten und fehlerhaften Zeilen"""
+        loader = DataLoader()
+        path = tmp_path / "orders.csv"
+        path.write_text("order_id,start_location,end_location,priority\n1,A,B,2\n2,C,D,\n", encoding="utf-8")
+        orders = loader.load_orders(str(path))
+        assert [(o.order_id, o.priority) for o in orders] == [(1, 2)]
+        
+        alias_path = tmp_path / "orders_alias.csv"
+        alias_path.write_text("id,start,end\n5,A,B\nx,C,D\n", encoding="utf-8")
+        orders = loader.load_orders(str(alias_path))
+        assert [(o.order_id, o.start_location, o.priority) for o in orders] == [(5, "A", 1)]
+
+    def test_load_orders_csv_streaming(self, tmp_path, monkeypatch):
+        """Test blockweises CSV-Lesen oberhalb der Größenschwelle"""
+        from app.services import data_loader
+        monkeypatch.setattr(data_loader, "STREAM_THRESHOLD_BYTES", 0)
+        monkeypatch.setattr(data_loader, "CSV_BLOCK_SIZE_BYTES", 64)
+        loader = DataLoader()
+        path = tmp_path / "orders.csv"
+        rows = "".join(f"{i},Start{i},Ziel{i},{i % 10 + 1}\n" for i in range(1, 51))
+        path.write_text("order_id,start_location,end_location,priority\n" + rows, encoding="utf-8")
+        orders = loader.load_orders(str(path))
+        assert [o.order_id for o in orders] == list(range(1, 51))
+
+    def test_load_orders_parquet(self, tmp_path):
+        """Test Parquet-Roundtrip für Aufträge"""
+        loader = DataLoader()
+        orders = [
+            Order(order_id=1, start_location="Berlin", end_location="Köln", priority=2),
+            Order(order_id=2, start_location="Hamburg", end_location="München", priority=1),
+        ]
+        path = tmp_path / "orders.parquet"
+        loader.save_orders_parquet(orders, str(path))
+        assert loader.load_orders(str(path)) == orders
+
+    def test_load_csv_without_pyarrow(self, tmp_path, monkeypatch):
+        """Test zeilenweiser CSV-Pfad mit Positions-Indexing"""
+        from app.services import data_loader
+        monkeypatch.setattr(data_loader, "PYARROW_AVAILABLE", False)
+        loader = DataLoader()
+        orders_path = tmp_path / "orders.csv"
+        orders_path.write_text("id,start,end,priority\n5,A,B,3\nx,C,D,1\n6,E\n", encoding="utf-8")
+        vehicles_path = tmp_path / "vehicles.csv"
+        vehicles_path.write_text("vehicle_id,capacity\nv1,50\nv2,\n", encoding="utf-8")
+        orders = loader.load_orders(str(orders_path))
+        assert [(o.order_id, o.start_location, o.priority) for o in orders] == [(5, "A", 3)]
+        assert [v.vehicle_id for v in loader.load_vehicles(str(vehicles_path))] == ["v1"]
+
+    def test_load_json_streaming(self, tmp_path, monkeypatch):
+        """Test DataLoader streamt JSON oberhalb der Größenschwelle"""
+        from app.services import data_loader
+        monkeypatch.setattr(data_loader, "STREAM_THRESHOLD_BYTES", 0)
+        loader = DataLoader()
+        orders_path = tmp_path / "orders.json"
+        orders_path.write_text(
+            ' [{"order_id": 1, "start_location": "A", "end_location": "B", "priority": 1}]',
+            encoding="utf-8"
+        )
+        vehicles_path = tmp_path / "vehicles.json"
+        vehicles_path.write_text('{"vehicles": [{"vehicle_id": "v1", "capacity": 80}]}', encoding="utf-8")
+        assert [o.order_id for o in loader.load_orders(str(orders_path))] == [1]
+        assert loader.load_vehicles(str(vehicles_path))[0].capacity == 80
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -1,8 +1,17 @@
+import asyncio
 import pytest
-from app.services.rl_agent import RLAgent
-from app.services.environment import TourEnvironment
+import numpy as np
+from datetime import datetime
+import networkx as nx
+from app.services.rl_agent import RLAgent, build_dqn
+from app.services.environment import TourEnvironment, VecTourEnvironment, SubprocVecTourEnvironment
 from app.services.simulation import Simulation
 from app.services.data_loader import DataLoader
+from app.services.road_network import RoadNetwork
+from app.services.travel_time_predictor import TravelTimePredictor
+from app.services.traffic_api import TrafficAPIClient, traffic_client
+from app.services.route_batcher import RouteBatcher
+from app.services.replay import SharedReplayBuffer, SharedPolicyWeights, SharedEpisodeStats, actor_worker, q_values_numpy
 from app.models.schemas import Order
 
 class TestRLAgent:
@@ -35,12 +44,59 @@ class TestRLAgent:
         # Priority 1 sollte zuerst kommen
         assert "C" in stops
 
+    def test_agent_predict_batch_matches_predict(self):
+        """Test batched prediction returns the same routes as single predictions"""
+        agent = RLAgent()
+        batches = [
+            [
+                Order(order_id=3, start_location="A", end_location="B", priority=2),
+                Order(order_id=1, start_location="C", end_location="D", priority=1),
+                Order(order_id=2, start_location="E", end_location="F", priority=1),
+            ],
+            [],
+            [Order(order_id=7, start_location="Berlin", end_location="Köln", priority=5)],
+        ]
+        routes = agent.predict_batch(batches, delay_factor=0.0)
+        assert routes == [agent.predict(orders, delay_factor=0.0) for orders in batches]
+        assert routes[0] == ["C", "E", "A", "B"]
+        assert agent.predict_batch([[], []]) == [[], []]
+
+    def test_agent_predict_numeric_sort(self, monkeypatch):
+        """Test the array-based fallback sort orders like sorted() by (priority, order_id)"""
+        from app.services import rl_agent
+        orders = [
+            Order(order_id=(i * 7) % 50, start_location=f"S{i}", end_location=f"E{i}", priority=1 + i % 4)
+            for i in range(50)
+        ]
+        agent = RLAgent()
+        rl_agent._sorted_positions.cache_clear()
+        monkeypatch.setattr(rl_agent, "NUMERIC_SORT_MIN_ORDERS", 10 ** 6)
+        expected = agent._predict_naive(orders)
+        rl_agent._sorted_positions.cache_clear()
+        monkeypatch.setattr(rl_agent, "NUMERIC_SORT_MIN_ORDERS", 1)
+        assert agent._predict_naive(orders) == expected
+        
+        # Gleiche Auftragsliste: Sortierung kommt aus dem Cache
+        hits = rl_agent._sorted_positions.cache_info().hits
+        assert agent._predict_naive(list(orders)) == expected
+        assert rl_agent._sorted_positions.cache_info().hits == hits + 1
+
     def test_agent_predict_empty(self):
         """Test RLAgent prediction with empty list"""
         agent = RLAgent()
         stops = agent.predict([])
         assert stops == []
 
+    def test_agent_history_roundtrip(self, tmp_path):
+        """Test training history dump/load"""
+        agent = RLAgent()
+        agent.train(episodes=3)
+        path = tmp_path / "history.json"
+        agent.dump_history(str(path))
+        restored = RLAgent()
+        restored.load_history(str(path))
+        assert restored.get_training_history() == agent.get_training_history()
+
 class TestTourEnvironment:
     def test_environment_initialization(self):
         """Test TourEnvironment initialization"""
@@ -63,11 +119,44 @@ class TestTourEnvironment:
         """Test environment step"""
         env = TourEnvironment()
         action = {"assign": {"order_id": 1, "vehicle_id": "v1"}}
-        state, reward, done = env.step(action)
-        assert env.time == 1
+        state, reward, terminated, truncated, info = env.step(action)
         assert isinstance(state, dict)
         assert isinstance(reward, float)
-        assert isinstance(done, bool)
+        assert isinstance(terminated, bool)
+        assert isinstance(truncated, bool)
+        assert isinstance(info, dict)
+
+    def test_environment_step_truncates_and_autoresets(self):
+        """Test time limit truncates the episode and resets the environment"""
+        orders = [Order(order_id=1, start_location="A", end_location="B", priority=1)]
+        env = TourEnvironment(orders, max_time_steps=2)
+        state, _, terminated, truncated, info = env.step(0)
+        assert (terminated, truncated, info) == (False, False, {})
+        assert state["time"] == 1
+        
+        state, _, terminated, truncated, info = env.step(0)
+        assert not terminated and truncated
+        assert info["final_observation"]["time"] == 2
+        assert state["time"] == 0
+        assert env.time == 0
+
+    def test_environment_array_state(self):
+        """Test array_state returns the reused read-only state buffer"""
+        orders = [Order(order_id=1, start_location="A", end_location="B", priority=1)]
+        env = TourEnvironment(orders, max_time_steps=2, array_state=True)
+        state = env.reset()
+        assert isinstance(state, np.ndarray)
+        assert not state.flags.writeable
+        
+        next_state, reward, _, truncated, info = env.step(0)
+        assert next_state is state
+        assert next_state.tolist() == [1, 1, 0, reward]
+        assert np.array_equal(RLAgent._fill_state(np.empty(4, dtype=np.float32), next_state), next_state)
+        
+        next_state, _, _, truncated, info = env.step(0)
+        assert truncated
+        assert info["final_observation"][0] == 2
+        assert next_state[0] == 0
 
     def test_environment_add_vehicle(self):
         """Test adding vehicle to environment"""
@@ -77,6 +166,60 @@ class TestTourEnvironment:
         assert env.vehicles[0]["vehicle_id"] == "v1"
         assert env.vehicles[0]["capacity"] == 100
 
+    def test_environment_step_with_action_index(self):
+        """Test DQN action indices are rewarded like assignments"""
+        env = TourEnvironment()
+        assert env.step(0)[1] == 1.0
+        assert env.step(3)[1] == -0.5
+
+    def test_vec_environment_autoreset(self):
+        """Test VecTourEnvironment steps all envs and resets finished ones"""
+        orders = [Order(order_id=1, start_location="A", end_location="B", priority=1)]
+        vec_env = VecTourEnvironment(orders, num_envs=3, max_time_steps=2)
+        states = vec_env.reset()
+        assert len(states) == 3
+        actions = [{"assign": {"order_id": 1, "vehicle_id": "v1"}}] * 3
+        
+        states, rewards, dones, terminated, final_states = vec_env.step(actions)
+        assert rewards.tolist() == [1.0, 1.0, 1.0]
+        assert not dones.any()
+        assert [state["time"] for state in states] == [1, 1, 1]
+        
+        # Zeitlimit erreicht: beendet, aber nicht terminiert -> Autoreset
+        states, rewards, dones, terminated, final_states = vec_env.step(actions)
+        assert dones.all()
+        assert not terminated.any()
+        assert [state["time"] for state in final_states] == [2, 2, 2]
+        assert [state["time"] for state in states] == [0, 0, 0]
+
+    def test_subproc_vec_environment_matches_sync(self):
+        """Test SubprocVecTourEnvironment returns the same numbers as the sync variant"""
+        orders = [Order(order_id=1, start_location="A", end_location="B", priority=1)]
+        actions = [{"assign": {"order_id": 1, "vehicle_id": "v1"}}, {}]
+        sync_env = VecTourEnvironment(orders, num_envs=2, max_time_steps=2)
+        with SubprocVecTourEnvironment(orders, num_envs=2, max_time_steps=2) as subproc_env:
+            fields = ("time", "orders_left", "assigned_orders_count", "total_reward")
+            project = lambda states: [[state[f] for f in fields] for state in states]
+            assert project(subproc_env.reset()) == project(sync_env.reset())
+            for _ in range(3):
+                expected = sync_env.step(actions)
+                result = subproc_env.step(actions)
+                assert project(result[0]) == project(expected[0])
+                for got, want in zip(result[1:4], expected[1:4]):
+                    assert got.tolist() == want.tolist()
+                assert project(result[4]) == project(expected[4])
+            assert subproc_env.get_possible_actions() == [0]
+        assert subproc_env.closed
+
+    def test_vec_environment_terminated_without_orders(self):
+        """Test episodes without orders count as terminated"""
+        vec_env = VecTourEnvironment(num_envs=2)
+        vec_env.reset()
+        _, rewards, dones, terminated, _ = vec_env.step([{}, {}])
+        assert rewards.tolist() == [-0.5, -0.5]
+        assert dones.all()
+        assert terminated.all()
+
 class TestSimulation:
     def test_simulation_initialization(self):
         """Test Simulation initialization"""
@@ -131,6 +274,309 @@ class TestSimulation:
         assert sim.time == 0
         assert len(sim.events) == 0
 
+    def test_simulation_event_order(self):
+        """Test events are processed by timestamp, ties in insertion order"""
+        sim = Simulation()
+        for order_id, timestamp in [(1, 5), (2, 1), (3, 5), (4, 3)]:
+            sim.add_event({"type": "order_completed", "timestamp": timestamp, "data": {"order_id": order_id}})
+        sim.run_simulation(num_steps=10)
+        assert sim.completed_orders == [2, 4, 1, 3]
+
+    def test_simulation_state_timestamp(self):
+        """Test only get_state_with_timestamp adds the wall-clock timestamp"""
+        sim = Simulation()
+        state = sim.get_state()
+        assert "timestamp" not in state
+        stamped = sim.get_state_with_timestamp()
+        assert stamped.pop("timestamp")
+        assert stamped == state
+
+    def test_simulation_add_events_batch(self):
+        """Test batched events merge with queued ones in timestamp order"""
+        sim = Simulation()
+        sim.add_event({"type": "order_completed", "timestamp": 4, "data": {"order_id": 1}})
+        sim.add_events([
+            {"type": "order_completed", "timestamp": t, "data": {"order_id": order_id}}
+            for order_id, t in [(2, 2), (3, 6), (4, 4)]
+        ])
+        sim.add_events([{"type": "order_completed", "timestamp": 0, "data": {"order_id": 5}}])
+        sim.run_simulation(num_steps=10)
+        assert sim.completed_orders == [5, 2, 1, 4, 3]
+
+class TestRoadNetwork:
+    def test_shortest_path(self):
+        """Test shortest path over the default network"""
+        network = RoadNetwork()
+        path = network.shortest_path("Köln", "Stuttgart")
+        assert path == ["Köln", "Frankfurt", "Stuttgart"]
+        assert network.shortest_path_length("Köln", "Stuttgart") == 210
+
+    def test_path_cache_dropped_on_weight_change(self):
+        """Test cached shortest-path trees are discarded when weights change"""
+        import gc
+        import weakref
+        network = RoadNetwork()
+        network.shortest_path("Berlin", "Hamburg")
+        network.shortest_path("Köln", "Stuttgart")
+        network.update_traffic_bulk(0.5)
+        assert network.shortest_path_length("Köln", "Stuttgart") == 315
+        assert set(network._sssp_cache) == {"Köln"}
+        
+        # Der Cache hängt an der Instanz und hält sie nicht am Leben
+        ref = weakref.ref(network)
+        del network
+        gc.collect()
+        assert ref() is None
+
+    def test_csr_swapped_not_mutated(self):
+        """Test weight updates build a new CSR matrix instead of writing in place"""
+        network = RoadNetwork()
+        before = network._ensure_csr()
+        data = before.data.copy()
+        network.update_traffic_bulk(0.5)
+        after = network._ensure_csr()
+        assert after is not before
+        assert np.array_equal(before.data, data)
+        assert np.allclose(after.data, data * 1.5)
+        assert network._ensure_csr() is after
+
+    def test_add_location_waits_for_running_query(self, monkeypatch):
+        """Test a concurrent add_location cannot interleave with a path query"""
+        import threading
+        from app.services import road_network as road_network_module
+        network = RoadNetwork()
+        dijkstra = road_network_module.dijkstra
+        in_query = threading.Event()
+        added = threading.Event()
+        
+        def slow_dijkstra(*args, **kwargs):
+            in_query.set()
+            # Ohne Lock fügt der Writer den Knoten genau hier ein
+            added.wait(timeout=0.2)
+            return dijkstra(*args, **kwargs)
+        
+        def writer():
+            in_query.wait(timeout=5)
+            network.add_location("Neustadt")
+            added.set()
+        
+        monkeypatch.setattr(road_network_module, "dijkstra", slow_dijkstra)
+        thread = threading.Thread(target=writer)
+        thread.start()
+        # Der Query-Stand kennt "Neustadt" noch nicht: None statt IndexError
+        assert network.shortest_path("Köln", "Neustadt") is None
+        thread.join(timeout=5)
+        assert network.has_location("Neustadt")
+
+    def test_shortest_path_unknown_location(self):
+        """Test shortest path with unknown location"""
+        network = RoadNetwork()
+        assert network.shortest_path("Berlin", "Atlantis") is None
+        assert network.shortest_path_length("Berlin", "Atlantis") is None
+
+    def test_shortest_path_after_network_change(self):
+        """Test cached paths are invalidated when the network changes"""
+        network = RoadNetwork()
+        assert network.shortest_path("Köln", "Stuttgart") == ["Köln", "Frankfurt", "Stuttgart"]
+        network.add_route("Köln", "Stuttgart", 60)
+        assert network.shortest_path("Köln", "Stuttgart") == ["Köln", "Stuttgart"]
+        network.update_traffic("Köln", "Stuttgart", 3.0)
+        assert network.shortest_path("Köln", "Stuttgart") == ["Köln", "Frankfurt", "Stuttgart"]
+
+    def test_get_neighbors(self):
+        """Test neighbors come from the plain adjacency dict"""
+        network = RoadNetwork()
+        assert network.get_neighbors("Köln") == ["Düsseldorf", "Frankfurt", "Dortmund"]
+        assert network.get_neighbors("Atlantis") == []
+        network.add_route("Köln", "Bonn", 25)
+        assert "Bonn" in network.get_neighbors("Köln")
+        assert network.get_neighbors("Bonn") == ["Köln"]
+
+    def test_shortest_paths_share_source(self):
+        """Test paths from the same source reuse one Dijkstra run"""
+        network = RoadNetwork()
+        assert network.shortest_path("Köln", "Stuttgart") == ["Köln", "Frankfurt", "Stuttgart"]
+        assert network.shortest_path("Köln", "Köln") == ["Köln"]
+        assert network.shortest_path("Köln", "Hamburg") == ["Köln", "Düsseldorf", "Hamburg"]
+
+    @pytest.mark.parametrize("use_scipy,use_numba", [(True, False), (False, True), (False, False)])
+    def test_shortest_path_matches_networkx(self, use_scipy, use_numba, monkeypatch):
+        """Test CSR, kernel and heap Dijkstra paths are as short as the NetworkX reference"""
+        from app.services import road_network
+        monkeypatch.setattr(road_network, "SCIPY_AVAILABLE", use_scipy)
+        monkeypatch.setattr(road_network, "NUMBA_AVAILABLE", use_numba)
+        network = RoadNetwork()
+        network.add_location("Insel")
+        reference_graph = nx.Graph()
+        reference_graph.add_nodes_from(network.get_all_locations())
+        for edge in network.get_all_edges():
+            reference_graph.add_edge(edge['start'], edge['end'], weight=edge['weight'])
+        for start in network.get_all_locations():
+            for end in network.get_all_locations():
+                path = network.shortest_path(start, end)
+                if not nx.has_path(reference_graph, start, end):
+                    assert path is None
+                    assert network.shortest_path_length(start, end) is None
+                    continue
+                length = sum(network.get_edge_weight(u, v) for u, v in zip(path, path[1:]))
+                reference = nx.shortest_path_length(reference_graph, start, end, weight="weight")
+                assert length == reference
+                assert network.shortest_path_length(start, end) == reference
+
+    @pytest.mark.parametrize("use_scipy", [True, False])
+    def test_route_segment_lengths(self, use_scipy, monkeypatch):
+        """Test segment lengths match per-pair shortest path lengths"""
+        from app.services import road_network
+        monkeypatch.setattr(road_network, "SCIPY_AVAILABLE", use_scipy)
+        network = RoadNetwork()
+        network.add_location("Insel")
+        route = ["Köln", "Stuttgart", "Berlin", "Insel", "Atlantis", "Köln"]
+        lengths = network.route_segment_lengths(route)
+        assert lengths == [network.shortest_path_length(u, v) for u, v in zip(route, route[1:])]
+        assert lengths[0] == 210
+        assert lengths[2:] == [None, None, None]
+        assert network.route_segment_lengths(["Köln"]) == []
+
+    def test_shortest_path_length_after_traffic_update(self):
+        """Test traffic updates swap in a freshly built CSR matrix and invalidate cached lengths"""
+        network = RoadNetwork()
+        assert network.shortest_path_length("Köln", "Stuttgart") == 210
+        network.update_traffic("Köln", "Frankfurt", 1.0)
+        assert network.shortest_path_length("Köln", "Stuttgart") == 330
+        network.update_traffic_bulk(0.0)
+        assert network.shortest_path_length("Köln", "Stuttgart") == 210
+
+    def test_update_traffic_batch(self):
+        """Test batched edge weight updates"""
+        network = RoadNetwork()
+        network.update_traffic_batch(
+            [("Köln", "Düsseldorf"), ("Berlin", "Hamburg"), ("Berlin", "Atlantis")],
+            [1.0, 0.5, 0.5],
+        )
+        assert network.get_edge_weight("Köln", "Düsseldorf") == 60
+        assert network.get_edge_weight("Düsseldorf", "Köln") == 60
+        assert network.get_edge_weight("Berlin", "Hamburg") == 270
+
+    def test_get_congested_routes(self):
+        """Test congested routes follow traffic updates and the threshold"""
+        network = RoadNetwork()
+        assert network.get_congested_routes() == []
+        network.update_traffic("Köln", "Frankfurt", 0.8)
+        network.update_traffic_batch([("Berlin", "Hamburg"), ("Dortmund", "Köln")], [0.5, 0.2])
+        congested = network.get_congested_routes(threshold=0.5)
+        assert [(e['start'], e['end']) for e in congested] == [("Berlin", "Hamburg"), ("Köln", "Frankfurt")]
+        assert congested[1]['delay_factor'] == pytest.approx(0.8)
+        assert len(network.get_congested_routes(threshold=0.1)) == 3
+        network.update_traffic_bulk(0.0)
+        assert network.get_congested_routes(threshold=0.1) == []
+
+    def test_update_traffic_bulk(self):
+        """Test global delay factor is applied to every edge"""
+        network = RoadNetwork()
+        network.update_traffic_bulk(0.5)
+        assert network.get_edge_weight("Köln", "Düsseldorf") == 45
+        assert network.get_edge_weight("Berlin", "Hamburg") == 270
+        network.update_traffic_bulk(0.0)
+        assert network.get_edge_weight("Berlin", "Hamburg") == 180
+
+class TestTravelTimePredictor:
+    def test_hour_delay_factor_table(self):
+        """Test precomputed hour table matches the interpolated traffic patterns"""
+        predictor = TravelTimePredictor()
+        monday = datetime(2030, 1, 7)
+        saturday = datetime(2030, 1, 12)
+        assert predictor._get_hour_delay_factor(monday.replace(hour=8)) == 0.9
+        assert predictor._get_hour_delay_factor(monday.replace(hour=11)) == pytest.approx(0.25)
+        assert predictor._get_hour_delay_factor(monday.replace(hour=3)) == 0.1
+        assert predictor._get_hour_delay_factor(saturday.replace(hour=9)) == pytest.approx(0.15)
+        assert predictor._get_hour_delay_factor(saturday.replace(hour=23)) == 0.1
+
+    def test_traffic_level_boundaries(self):
+        """Test traffic levels switch exactly at the thresholds"""
+        predictor = TravelTimePredictor()
+        assert predictor._get_traffic_level(0.0) == 'sehr gering'
+        assert predictor._get_traffic_level(0.2) == 'gering'
+        assert predictor._get_traffic_level(0.59) == 'mittel'
+        assert predictor._get_traffic_level(0.8) == 'sehr hoch'
+
+    def test_find_optimal_departure_time(self, monkeypatch):
+        """Test optimum and alternatives are ranked by travel time, ties by departure"""
+        predictor = TravelTimePredictor()
+        times = [90.0, 60.0, 75.0, 60.0, 120.0, 70.0]
+        monkeypatch.setattr(
+            predictor, "_predict_departures",
+            lambda start, end, departures: [{'predicted_time_minutes': t} for t in times]
+        )
+        earliest = datetime(2030, 1, 7, 6)
+        result = predictor.find_optimal_departure_time("Berlin", "Köln", earliest, hours_window=6)
+        assert result['recommendation']['hour_offset'] == 1
+        assert [p['hour_offset'] for p in result['alternatives']] == [3, 5, 2]
+        assert result['total_options_analyzed'] == 6
+        
+        # Nur Abfahrten, die bis 09:30 ankommen, sind gültig
+        latest = datetime(2030, 1, 7, 9, 30)
+        result = predictor.find_optimal_departure_time("Berlin", "Köln", earliest, latest, hours_window=6)
+        assert result['recommendation']['hour_offset'] == 1
+        assert [p['hour_offset'] for p in result['alternatives']] == [2, 0]
+
+class TestTrafficAPIClient:
+    def test_status_label_boundaries(self):
+        """Test status labels switch exactly at the thresholds"""
+        client = TrafficAPIClient()
+        assert [client._get_status_label(f) for f in (0.0, 0.2, 0.5, 0.79, 1.0)] == [
+            "frei", "leicht", "mittel", "mittel", "stark"
+        ]
+
+    def test_live_delay_served_from_cache(self):
+        """Test cached delay factor is returned within the TTL"""
+        client = TrafficAPIClient()
+        client._set_cached_delay(0.4)
+        assert client.get_live_traffic_delay() == 0.4
+        assert client.get_traffic_info_for_route("Berlin", "Köln")["delay_factor"] == 0.4
+
+    def test_route_info_async_matches_sync(self):
+        """Test async route info uses the shared delay cache"""
+        client = TrafficAPIClient()
+        client._set_cached_delay(0.6)
+        info = asyncio.run(client.get_traffic_info_for_route_async("Berlin", "Köln"))
+        assert info == client.get_traffic_info_for_route("Berlin", "Köln")
+        assert info["traffic_status"] == "mittel"
+
+    def test_live_delay_cache_expires(self):
+        """Test cached delay factor expires after the TTL"""
+        client = TrafficAPIClient()
+        client._set_cached_delay(0.4)
+        client.cache_ttl = 0
+        assert client._get_cached_delay() is None
+
+    def test_failed_fetch_is_not_cached(self, monkeypatch):
+        """Test a failed fetch returns 0.0 without serving it from the cache later"""
+        import requests
+        
+        class FakeResponse:
+            status_code = 200
+            
+            def raise_for_status(self):
+                pass
+            
+            def json(self):
+                return {"roadworks": [{}] * 10}
+        
+        client = TrafficAPIClient()
+        responses = iter([requests.ConnectionError("down"), requests.ConnectionError("down")])
+        
+        def fake_get(url, timeout=None):
+            error = next(responses, None)
+            if error is not None:
+                raise error
+            return FakeResponse()
+        
+        monkeypatch.setattr(client.session, "get", fake_get)
+        assert client.get_live_traffic_delay() == 0.0
+        assert client._get_cached_delay() is None
+        assert client.get_live_traffic_delay() == 0.2
+        assert client._get_cached_delay() == 0.2
+
 class TestDataLoader:
     def test_loader_initialization(self):
         """Test DataLoader initialization"""
@@ -142,3 +588,203 @@ class TestDataLoader:
         loader = DataLoader()
         with pytest.raises(ValueError):
             loader.load_orders("test.xml")
+
+class TestRouteBatcher:
+    def test_concurrent_requests_share_one_batch(self, monkeypatch):
+        """Test concurrent submits are answered by a single predict_batch call"""
+        agent = RLAgent()
+        calls = []
+        predict_batch = agent.predict_batch
+        
+        def counting_predict_batch(batches, delay_factor):
+            calls.append(len(batches))
+            return predict_batch(batches, delay_factor)
+        
+        async def no_live_delay():
+            return 0.0
+        
+        monkeypatch.setattr(agent, "predict_batch", counting_predict_batch)
+        monkeypatch.setattr(traffic_client, "get_live_traffic_delay_async", no_live_delay)
+        requests = [
+            [Order(order_id=i, start_location=f"S{i}", end_location=f"E{i}", priority=1)]
+            for i in range(3)
+        ]
+        
+        async def run():
+            batcher = RouteBatcher(agent, max_batch_size=8, max_wait=0.05)
+            batcher.start()
+            try:
+                return await asyncio.gather(*(batcher.submit(orders) for orders in requests))
+            finally:
+                await batcher.stop()
+        
+        results = asyncio.run(run())
+        assert calls == [3]
+        assert results == [agent.predict(orders, delay_factor=0.0) for orders in requests]
+
+    def test_stop_cancels_in_flight_batch(self, monkeypatch):
+        """Test stop() resolves requests whose batch is still being processed"""
+        import threading
+        agent = RLAgent()
+        release = threading.Event()
+        
+        def blocking_predict_batch(batches, delay_factor):
+            release.wait(timeout=5)
+            return [[] for _ in batches]
+        
+        async def no_live_delay():
+            return 0.0
+        
+        monkeypatch.setattr(agent, "predict_batch", blocking_predict_batch)
+        monkeypatch.setattr(traffic_client, "get_live_traffic_delay_async", no_live_delay)
+        orders = [Order(order_id=1, start_location="A", end_location="B", priority=1)]
+        
+        async def run():
+            batcher = RouteBatcher(agent, max_batch_size=8, max_wait=0.0)
+            batcher.start()
+            request = asyncio.create_task(batcher.submit(orders))
+            await asyncio.sleep(0.05)
+            await batcher.stop()
+            release.set()
+            with pytest.raises(asyncio.CancelledError):
+                await asyncio.wait_for(request, timeout=1)
+        
+        asyncio.run(run())
+
+class TestDQNTraining:
+    """DQN-Pfade mit echtem PyTorch (ohne torch übersprungen)"""
+
+    @pytest.fixture
+    def dqn_settings(self, monkeypatch):
+        """Kleine Trainings-Settings, damit wenige Episoden reichen"""
+        pytest.importorskip("torch")
+        from app.core.config import settings
+        monkeypatch.setattr(settings, "RL_TORCH_COMPILE", False)
+        monkeypatch.setattr(settings, "RL_BATCH_SIZE", 4)
+        monkeypatch.setattr(settings, "RL_REPLAY_SIZE", 64)
+        monkeypatch.setattr(settings, "RL_SYNC_EVERY", 2)
+        monkeypatch.setattr(settings, "GRAPH_MAX_STEPS", 5)
+        return settings
+
+    @staticmethod
+    def _environment():
+        orders = [
+            Order(order_id=1, start_location="Berlin", end_location="Köln", priority=1),
+            Order(order_id=2, start_location="Hamburg", end_location="München", priority=2),
+        ]
+        return TourEnvironment(orders, max_time_steps=5)
+
+    def test_train_dqn_and_act_batch(self, dqn_settings):
+        """Test DQN training learns from replay batches and serves a scripted model"""
+        torch = pytest.importorskip("torch")
+        agent = RLAgent()
+        stats = agent.train(self._environment(), episodes=3)
+        assert stats["mode"] == "dqn"
+        assert agent.trained
+        assert agent._replay_len >= dqn_settings.RL_BATCH_SIZE
+        assert isinstance(agent.infer_model, torch.jit.ScriptModule)
+        
+        states = [self._environment().reset() for _ in range(3)]
+        actions = agent.act_batch(states)
+        assert actions.shape == (3,)
+        assert actions.dtype == np.int64
+        assert np.all((actions >= 0) & (actions < agent.output_dim))
+
+    def test_train_dqn_vectorised(self, dqn_settings):
+        """Test training over a VecTourEnvironment"""
+        pytest.importorskip("torch")
+        agent = RLAgent()
+        stats = agent.train(self._environment(), episodes=4, num_envs=2)
+        assert stats["mode"] == "dqn_vec"
+        assert stats["num_envs"] == 2
+        assert stats["total_steps"] > 0
+        assert agent.infer_model is not None
+
+    def test_train_distributed(self, dqn_settings):
+        """Test actor/learner training fills the shared buffer and runs all updates"""
+        pytest.importorskip("torch")
+        agent = RLAgent()
+        stats = agent.train_distributed(self._environment(), updates=6, num_actors=1)
+        assert stats["mode"] == "dqn_apex"
+        assert stats["updates"] == 6
+        assert stats["total_steps"] > 0
+        assert agent.trained
+
+    def test_compile_for_training_falls_back_to_eager(self, dqn_settings, monkeypatch):
+        """Test a failing torch.compile warm-up leaves the eager model in place"""
+        torch = pytest.importorskip("torch")
+        agent = RLAgent()
+        agent.input_dim = 4
+        model = build_dqn(4, 2)
+        assert agent._compile_for_training(model) is model
+        
+        def broken_compile(module):
+            def run(*args, **kwargs):
+                raise RuntimeError("no C++ compiler")
+            return run
+        
+        monkeypatch.setattr(dqn_settings, "RL_TORCH_COMPILE", True)
+        monkeypatch.setattr(torch, "compile", broken_compile, raising=False)
+        assert agent._compile_for_training(model) is model
+
+class TestSharedReplay:
+    def test_policy_weights_roundtrip(self):
+        """Test published weights are fetched once per version"""
+        rng = np.random.default_rng(0)
+        arrays = [rng.standard_normal((8, 4)).astype(np.float32), np.zeros(8, dtype=np.float32),
+                  rng.standard_normal((2, 8)).astype(np.float32), np.ones(2, dtype=np.float32)]
+        weights = SharedPolicyWeights([a.shape for a in arrays])
+        try:
+            assert weights.fetch(-1)[0] == 0
+            weights.publish(arrays)
+            version, fetched = weights.fetch(0)
+            assert version == 1
+            assert all(np.array_equal(a, b) for a, b in zip(arrays, fetched))
+            assert weights.fetch(version) is None
+            
+            state = rng.standard_normal(4).astype(np.float32)
+            expected = arrays[2] @ np.maximum(arrays[0] @ state + arrays[1], 0) + arrays[3]
+            assert np.allclose(q_values_numpy(fetched, state), expected)
+        finally:
+            weights.close()
+
+    def test_actor_fills_shared_buffer(self):
+        """Test an actor process writes transitions into the shared buffer"""
+        import multiprocessing
+        rng = np.random.default_rng(0)
+        arrays = [rng.standard_normal((8, 4)).astype(np.float32), np.zeros(8, dtype=np.float32),
+                  rng.standard_normal((1, 8)).astype(np.float32), np.zeros(1, dtype=np.float32)]
+        buffer = SharedReplayBuffer(capacity=32, state_dim=4)
+        weights = SharedPolicyWeights([a.shape for a in arrays])
+        weights.publish(arrays)
+        stop_event = multiprocessing.Event()
+        episode_stats = SharedEpisodeStats()
+        orders = [Order(order_id=1, start_location="A", end_location="B", priority=1)]
+        actor = multiprocessing.Process(
+            target=actor_worker,
+            args=(orders, 5, 5, buffer, weights, 0.1, stop_event, episode_stats, 0),
+            daemon=True
+        )
+        actor.start()
+        try:
+            for _ in range(500):
+                if buffer.total_added >= 64:
+                    break
+                actor.join(timeout=0.01)
+            assert buffer.total_added >= 64
+            assert len(buffer) == 32
+            states, next_states, actions, rewards, dones = buffer.sample(16, rng)
+            assert states.shape == (16, 4)
+            assert set(actions.tolist()) == {0}
+            assert set(rewards.tolist()) == {1.0}
+            assert np.all(next_states[:, 0] >= 1)
+            
+            # Jede Episode endet nach 5 Schritten mit Reward 1.0 pro Schritt
+            episodes, avg_reward = episode_stats.snapshot()
+            assert episodes >= 64 // 5
+            assert avg_reward == 5.0
+        finally:
+            stop_event.set()
+            actor.join(timeout=5)
+            buffer.close()
+            weights.close()